@@ -333,7 +333,7 @@ class DashboardPage(QWidget):
 
     # --- 状态更新 ---
 
-    def on_stage_changed(self, stage: str, idx: int):
+    def on_stage_changed(self, stage: str, idx: int, t: float = None):
         self.badge_stage.setText(f"环节: {stage}")
         if stage == "运动想象":
             try:
@@ -12,7 +12,8 @@ import logging
 import numpy as np
 from datetime import datetime
 
-from PyQt5.QtCore import QObject, QThread, pyqtSignal, QTimer, pyqtSlot
+from PyQt5.QtCore import (QObject, QThread, pyqtSignal, QTimer, pyqtSlot,
+                          QRunnable, QThreadPool, QMetaObject, Qt, Q_ARG)
 
 # 引入 Core 模块
 from . import dsp
@@ -37,35 +38,40 @@ except ImportError:
 
 
 class RingBuffer:
-    """高性能环形缓冲区"""
+    """高性能环形缓冲区 (通道优先存储: n_channels x maxlen，单通道样本在内存中连续)"""
 
     def __init__(self, n_channels, maxlen):
         self.n_channels = n_channels
         self.maxlen = maxlen
-        self.buf = np.zeros((maxlen, n_channels), dtype=np.float32)
+        self.buf = np.zeros((n_channels, maxlen), dtype=np.float32)
         self.idx = 0
         self.full = False
+        # 累计写入样本数 (单调递增，不随回绕归零)
+        self.total = 0
 
     def append(self, samples):
+        """samples: (n_samples, n_channels)，写入时转置一次"""
         if samples.ndim == 1:
             samples = samples.reshape(1, -1)
         n = samples.shape[0]
         if n == 0: return
+        self.total += n
+        samples = samples.T
 
         if n > self.maxlen:
-            self.buf[:] = samples[-self.maxlen:, :]
+            self.buf[:] = samples[:, -self.maxlen:]
             self.idx = 0
             self.full = True
             return
 
         remain = self.maxlen - self.idx
         if n <= remain:
-            self.buf[self.idx: self.idx + n, :] = samples
+            self.buf[:, self.idx: self.idx + n] = samples
             self.idx += n
         else:
-            self.buf[self.idx:, :] = samples[:remain]
+            self.buf[:, self.idx:] = samples[:, :remain]
             overflow = n - remain
-            self.buf[:overflow, :] = samples[remain:]
+            self.buf[:, :overflow] = samples[:, remain:]
             self.idx = overflow
             self.full = True
 
@@ -73,15 +79,30 @@ class RingBuffer:
             self.idx = 0
             self.full = True
 
-    def get_last(self, n):
+    def get_last(self, n, out=None):
+        """
+        返回最近 n 个样本，形状 (n_channels, n)。
+        返回的是拷贝：快照会交给线程池使用，不能与后续写入共享内存。
+
+        out: 可选的预分配数组 (k, n)，仅拷贝前 k 个通道写入其中并返回 out
+        """
         if not self.full and self.idx < n:
             return None
+        if out is not None:
+            k = out.shape[0]
+            if self.idx >= n:
+                np.copyto(out, self.buf[:k, self.idx - n: self.idx])
+            else:
+                head = n - self.idx
+                np.copyto(out[:, :head], self.buf[:k, self.maxlen - head:])
+                np.copyto(out[:, head:], self.buf[:k, :self.idx])
+            return out
         if self.idx >= n:
-            return self.buf[self.idx - n: self.idx, :].copy()
+            return self.buf[:, self.idx - n: self.idx].copy()
         else:
-            part1 = self.buf[self.idx - n + self.maxlen:, :]
-            part2 = self.buf[:self.idx, :]
-            return np.vstack((part1, part2))
+            part1 = self.buf[:, self.idx - n + self.maxlen:]
+            part2 = self.buf[:, :self.idx]
+            return np.concatenate((part1, part2), axis=1)
 
 
 class AcquisitionThread(QThread):
@@ -89,7 +110,7 @@ class AcquisitionThread(QThread):
     采集线程 (Phase 14: 增加流量埋点)
     """
     connection_result = pyqtSignal(bool, str)  # 连接结果(成功/失败, 信息)
-    data_ready = pyqtSignal(object)  # 数据块
+    data_ready = pyqtSignal(object, float)  # 数据块, 末样本时间戳 (time.time())
     error_occurred = pyqtSignal(str)  # 运行时错误
 
     # [Phase 14] 流量监控信号: (方向 "TX"/"RX", 内容 bytes/str)
@@ -101,6 +122,26 @@ class AcquisitionThread(QThread):
         self._running = False
         self._paused = False
 
+        # 流量摘要限速：两次发送之间累计字节/包数，最多每 0.1 s 发一次
+        self._traffic_interval = 0.1
+        self._last_traffic_emit = 0.0
+        self._rx_bytes = 0
+        self._rx_count = 0
+
+    def _report_rx(self, tag, n_bytes):
+        self._rx_bytes += n_bytes
+        self._rx_count += 1
+        t = time.monotonic()
+        if t - self._last_traffic_emit < self._traffic_interval:
+            return
+        if self._rx_count == 1:
+            self.sig_traffic.emit("RX", f"{tag}: {self._rx_bytes} bytes")
+        else:
+            self.sig_traffic.emit("RX", f"{tag}: {self._rx_bytes} bytes / {self._rx_count} reads")
+        self._last_traffic_emit = t
+        self._rx_bytes = 0
+        self._rx_count = 0
+
     def run(self):
         self._running = True
         mode = self.cfg.get('mode', 'demo')
@@ -188,7 +229,7 @@ class AcquisitionThread(QThread):
                     if ser.in_waiting:
                         raw_s = ser.read(ser.in_waiting)
                         # [Phase 14] 串口流量摘要
-                        self.sig_traffic.emit("RX", f"Serial: {len(raw_s)} bytes")
+                        self._report_rx("Serial", len(raw_s))
 
                         lines = raw_s.decode(errors='ignore').split('\n')
                         vals = []
@@ -225,7 +266,7 @@ class AcquisitionThread(QThread):
                             continue  # 丢包
 
                         # [Phase 14] TCP 流量摘要 (仅长度，防刷屏)
-                        self.sig_traffic.emit("RX", f"TCP Packet: {len(raw_bytes)} bytes")
+                        self._report_rx("TCP", len(raw_bytes))
 
                         # 解析
                         n_items = n_ch * pack_points
@@ -237,9 +278,9 @@ class AcquisitionThread(QThread):
                     except Exception as e:
                         raise e
 
-                # 发送数据
+                # 发送数据 (空块在此过滤，槽函数不再重复检查)
                 if chunk is not None and chunk.size > 0:
-                    self.data_ready.emit(chunk)
+                    self.data_ready.emit(chunk, time.time())
 
         except Exception as e:
             if self._running:
@@ -253,6 +294,54 @@ class AcquisitionThread(QThread):
                 pass
 
 
+class _PredictTask(QRunnable):
+    """
+    在线预测任务 (在 QThreadPool 中执行)
+    持有数据快照与模型引用，滤波 + CSP + 分类完成后排队回调 worker
+    """
+
+    def __init__(self, worker, raw, srate, notch_freq, band_pass, csp, scaler, clf):
+        super().__init__()
+        self.worker = worker
+        self.raw = raw
+        self.srate = srate
+        self.notch_freq = notch_freq
+        self.band_pass = band_pass
+        self.csp = csp
+        self.scaler = scaler
+        self.clf = clf
+
+    def run(self):
+        label, confidence = "", 0.0
+        try:
+            # 快照已是 (n_channels, n_samples)，沿时间轴 (axis=-1) 滤波，无需转置
+            eeg_data = self.raw[:8]
+
+            eeg_data = dsp.notch_filter(eeg_data, self.srate, freq=self.notch_freq, axis=-1)
+            eeg_data = dsp.butter_filter(eeg_data, self.srate,
+                                         f_low=self.band_pass[0],
+                                         f_high=self.band_pass[1], axis=-1)
+
+            feat = self.csp.transform(eeg_data)
+            feat = self.scaler.transform(feat)
+
+            if hasattr(self.clf, "predict_proba"):
+                probs = self.clf.predict_proba(feat)[0]
+                pred_idx = np.argmax(probs)
+                confidence = float(probs[pred_idx])
+            else:
+                pred_idx = self.clf.predict(feat)[0]
+                confidence = 1.0
+
+            label = "left" if pred_idx == 0 else "right"
+        except Exception:
+            label = ""
+
+        # 回到 worker 所在线程；空标签表示本次预测失败，仅释放 inflight 标记
+        QMetaObject.invokeMethod(self.worker, "_on_prediction_done", Qt.QueuedConnection,
+                                 Q_ARG(str, label), Q_ARG(float, confidence))
+
+
 class EEGWorker(QObject):
     """
     EEG 业务控制器
@@ -289,6 +378,14 @@ class EEGWorker(QObject):
         self.win_size_sec = 1.0
         self._last_pred_label = "unknown"
 
+        # 预测节流：缓冲区新增样本不足时跳过本次预测
+        self._last_pred_idx = -1
+        self._min_new_samples = int(self.win_size_sec * self.srate) // 4
+        # 已有预测任务在线程池中排队/执行时丢弃新的定时 tick
+        self._pred_inflight = False
+        # 预测窗口暂存区 (8 x 窗长)，由 _init_runtime_resources 分配
+        self._scratch = None
+
     @pyqtSlot(dict)
     def start_acquisition(self, config: dict):
         if self.acq_thread and self.acq_thread.isRunning():
@@ -327,6 +424,11 @@ class EEGWorker(QObject):
             self.n_channels = 9
 
         self.buffer = RingBuffer(self.n_channels, int(self.srate * 10))
+        self._last_pred_idx = -1
+        self._min_new_samples = int(self.win_size_sec * self.srate) // 4
+        # 同一时刻至多一个预测任务 (见 _pred_inflight)，暂存区可安全复用
+        self._scratch = np.empty((min(8, self.n_channels), int(self.srate * self.win_size_sec)),
+                                 dtype=self.buffer.buf.dtype)
 
         try:
             path = DataManager().get_new_eeg_file_path(
@@ -364,24 +466,21 @@ class EEGWorker(QObject):
                 self.sig_status_msg.emit("模型未训练，无法开启预测")
                 return
             interval = 500
+            self._last_pred_idx = -1
             self.predict_timer.start(interval)
             self.sig_status_msg.emit("在线预测已开启")
         else:
             self.predict_timer.stop()
             self.sig_status_msg.emit("在线预测已关闭")
 
-    def _on_data_received(self, chunk: np.ndarray):
-        if chunk is None or chunk.size == 0: return
-
-        if self.csv_writer:
-            now = time.time()
-            dt = 1.0 / self.srate
-            rows = []
-            for i in range(len(chunk)):
-                t_point = now - (len(chunk) - 1 - i) * dt
-                row = [f"{t_point:.3f}"] + chunk[i].tolist()
-                rows.append(row)
-            self.csv_writer.writerows(rows)
+    def _on_data_received(self, chunk: np.ndarray, t_end: float):
+        if self.csv_file:
+            # 时间列向量化生成，整块一次写出 (不逐行 tolist)
+            n = len(chunk)
+            t_col = t_end - (n - 1 - np.arange(n)) / self.srate
+            rows = np.column_stack((t_col, chunk))
+            np.savetxt(self.csv_file, rows, delimiter=',', newline='\r\n',
+                       fmt=['%.3f'] + ['%.9g'] * chunk.shape[1])
 
         if self.buffer:
             self.buffer.append(chunk)
@@ -394,35 +493,29 @@ class EEGWorker(QObject):
 
     def _perform_prediction(self):
         if not self.buffer: return
-        n_samples = int(self.win_size_sec * self.srate)
-        raw = self.buffer.get_last(n_samples)
-        if raw is None: return
-
-        eeg_data = raw[:, :8]
+        # 采集停滞/暂停时，同一窗口无需重复滤波与分类
+        cur = self.buffer.total
+        if cur - self._last_pred_idx < self._min_new_samples: return
 
-        eeg_data = dsp.notch_filter(eeg_data, self.srate, freq=self.notch_freq)
-        eeg_data = dsp.butter_filter(eeg_data, self.srate,
-                                     f_low=self.band_pass[0],
-                                     f_high=self.band_pass[1])
+        if self._pred_inflight or self._scratch is None: return
 
-        eeg_data_T = eeg_data.T
-        try:
-            feat = self.model_csp.transform(eeg_data_T)
-            feat = self.scaler.transform(feat)
-
-            if hasattr(self.model_clf, "predict_proba"):
-                probs = self.model_clf.predict_proba(feat)[0]
-                pred_idx = np.argmax(probs)
-                confidence = probs[pred_idx]
-            else:
-                pred_idx = self.model_clf.predict(feat)[0]
-                confidence = 1.0
+        raw = self.buffer.get_last(self._scratch.shape[1], out=self._scratch)
+        if raw is None: return
 
-            label = "left" if pred_idx == 0 else "right"
-            self._last_pred_label = label
-            self.sig_prediction_result.emit(label, confidence)
-        except Exception:
-            pass
+        # 定时器回调只负责取快照与提交，滤波与分类在线程池中完成
+        task = _PredictTask(self, raw, self.srate, self.notch_freq, self.band_pass,
+                            self.model_csp, self.scaler, self.model_clf)
+        self._pred_inflight = True
+        self._last_pred_idx = cur
+        QThreadPool.globalInstance().start(task)
+
+    @pyqtSlot(str, float)
+    def _on_prediction_done(self, label, confidence):
+        self._pred_inflight = False
+        if not label or not self.predict_timer.isActive():
+            return
+        self._last_pred_label = label
+        self.sig_prediction_result.emit(label, confidence)
 
     def train_model(self, X_left, X_right, method='svm'):
         if len(X_left) < 2 or len(X_right) < 2:
@@ -430,8 +523,14 @@ class EEGWorker(QObject):
             return
 
         try:
-            X = np.concatenate([np.stack(X_left), np.stack(X_right)], axis=0)
-            y = np.array([0] * len(X_left) + [1] * len(X_right))
+            # 一次性预分配 (n_trials, n_channels, n_samples)，逐试次拷入，避免 stack + concatenate 的中间副本
+            n_left = len(X_left)
+            X = np.empty((n_left + len(X_right),) + np.shape(X_left[0]), dtype=np.float32)
+            for i, trial in enumerate(X_left):
+                X[i] = trial
+            for i, trial in enumerate(X_right):
+                X[n_left + i] = trial
+            y = np.concatenate([np.zeros(n_left, np.int8), np.ones(len(X_right), np.int8)])
 
             self.model_csp = CSP(n_components=4)
             self.model_csp.fit(X, y)
@@ -13,13 +13,14 @@
 
 import os
 import logging
+from collections import deque
 from datetime import datetime
 
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QTextCursor
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout, QLabel,
-    QComboBox, QLineEdit, QPushButton, QTextEdit, QFileDialog, QMessageBox
+    QComboBox, QLineEdit, QPushButton, QPlainTextEdit, QFileDialog, QMessageBox
 )
 
 APPLE_BLUE = "#007AFF"
@@ -31,6 +32,10 @@ class QtLogHandler(logging.Handler):
         self.panel = panel
 
     def emit(self, record: logging.LogRecord):
+        # 当前级别不显示的记录先原样保存，等切换过滤/导出用到时再走 Formatter
+        if not self.panel._level_passes(record.levelname):
+            self.panel._store_deferred(record, self)
+            return
         try:
             msg = self.format(record)
             self.panel.append_record(
@@ -52,7 +57,9 @@ class LogPanel(QWidget):
         self.log_dir = log_dir
         self.log_file = log_file
         os.makedirs(self.log_dir, exist_ok=True)
-        self._records = []  # [(ts, source, level, message)]
+        # [(ts, source, level, message)]；延迟记录为 [ts, source, level, (LogRecord, handler)]，首次用到时原地换成文本
+        # 上限与视图 setMaximumBlockCount 一致
+        self._records = deque(maxlen=5000)
         self._auto_scroll = True
         self._attached_handler = None
 
@@ -83,8 +90,11 @@ class LogPanel(QWidget):
         g.addWidget(self.btn_toggle_scroll, 0, 9)
         ctrl.setLayout(g)
 
-        self.text = QTextEdit()
+        # 纯文本控件 + 块数上限：追加开销恒定，旧行自动淘汰
+        self.text = QPlainTextEdit()
         self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(5000)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
 
         root = QVBoxLayout()
         root.addWidget(ctrl)
@@ -198,16 +208,39 @@ class LogPanel(QWidget):
         self.btn_toggle_scroll.setText(f"自动滚动：{'开' if self._auto_scroll else '关'}")
 
     def _format(self, rec):
-        ts, source, level, message = rec
-        return f"{ts} [{level}] {source}: {message}"
+        ts, source, level, _ = rec
+        return f"{ts} [{level}] {source}: {self._message(rec)}"
 
     def _append_to_view(self, rec):
-        self.text.append(self._format(rec))
+        self.text.appendPlainText(self._format(rec))
         if self._auto_scroll:
             self.text.moveCursor(QTextCursor.End)
 
+    def _level_passes(self, level: str) -> bool:
+        lv = self.level_combo.currentText()
+        return lv == "ALL" or level.upper() == lv
+
+    def _store_deferred(self, record, handler):
+        """保存当前不显示的 logging 记录，消息文本在首次需要时才格式化"""
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._records.append([ts, getattr(record, "name", "Logger") or "Unknown",
+                              record.levelname.upper(), (record, handler)])
+
+    @staticmethod
+    def _message(rec):
+        message = rec[3]
+        if isinstance(message, tuple):
+            record, handler = message
+            try:
+                message = handler.format(record).strip()
+            except Exception:
+                message = record.getMessage().strip()
+            # 只格式化一次：文本写回记录，释放 LogRecord
+            rec[3] = message
+        return message
+
     def _pass_filter(self, rec):
-        ts, source, level, message = rec
+        ts, source, level, _ = rec
         lv = self.level_combo.currentText().upper()
         kw = self.search_edit.text().strip().lower()
         # 级别过滤
@@ -215,7 +248,7 @@ class LogPanel(QWidget):
             return False
         # 关键字过滤
         if kw:
-            text = f"{ts} {source} {level} {message}".lower()
+            text = f"{ts} {source} {level} {self._message(rec)}".lower()
             if kw not in text:
                 return False
         return True
@@ -7,9 +7,14 @@ from PyQt5.QtWidgets import (
     QPushButton, QPlainTextEdit, QFileDialog, QMessageBox
 )
 import os
+import re
 
 DEFAULT_LOG = os.path.join("logs", "system_log.log")
 
+# 日志格式：asctime - LEVEL - logger - message，仅提取等级字段
+_LEVEL_RE = re.compile(r" - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ")
+_LEVEL_COLORS = {"ERROR": "#FF6B6B", "WARNING": "#FFD166", "INFO": "#A8E6CF", "DEBUG": "#B2EBF2"}
+
 class LogViewerWidget(QWidget):
     """系统日志查看器（实时 tail）"""
     new_line = pyqtSignal(str)
@@ -19,6 +24,7 @@ class LogViewerWidget(QWidget):
         self.log_path = log_path
         self._last_pos = 0
         self._paused = False
+        self._last_filter = None
         self.setFont(QFont("Microsoft YaHei", 10))
 
         # 顶部工具条
@@ -97,15 +103,37 @@ class LogViewerWidget(QWidget):
         self._tail(force_all=True)
 
     def _apply_filter(self):
+        # 过滤条件与文件 (大小/修改时间) 都未变化 (如重复回车) 时不重新加载整个文件
+        try:
+            st = os.stat(self.log_path)
+            file_key = (st.st_size, st.st_mtime)
+        except OSError:
+            file_key = None
+        cur = (self.level_combo.currentText(), self.search_edit.text().strip(), file_key)
+        if cur == self._last_filter:
+            return
+        self._last_filter = cur
         self._load_all()
 
     def _tail(self, force_all=False):
         if self._paused:
             return
-        if not os.path.exists(self.log_path):
+        try:
+            st = os.stat(self.log_path)
+        except OSError:
             if force_all and self.text.toPlainText().strip() == "":
                 self.text.appendPlainText("（暂无日志，运行后自动生成 logs/system_log.log）")
             return
+
+        if not force_all:
+            if st.st_size == self._last_pos:
+                return  # 文件无变化，免去 open/seek/read
+            if st.st_size < self._last_pos:
+                # 日志被轮转/截断：从头重新加载
+                self.text.clear()
+                self._last_pos = 0
+                force_all = True
+
         try:
             with open(self.log_path, "r", encoding="utf-8", errors="ignore") as f:
                 if not force_all:
@@ -118,26 +146,20 @@ class LogViewerWidget(QWidget):
         if not lines: return
 
         level = self.level_combo.currentText()
-        keyword = self.search_edit.text().strip()
+        keyword = self.search_edit.text().strip().lower()
+        search = _LEVEL_RE.search
 
         for s in lines:
             line = s.rstrip("\n")
-            lvl = None
-            # 解析格式：asctime - LEVEL - logger - message
-            parts = line.split(" - ", 3)
-            if len(parts) >= 3:
-                lvl = parts[1].strip()
+            m = search(line)
+            lvl = m.group(1) if m else None
 
-            if level != "ALL" and (lvl is None or lvl.upper() != level):
+            if level != "ALL" and lvl != level:
                 continue
-            if keyword and (keyword.lower() not in line.lower()):
+            if keyword and (keyword not in line.lower()):
                 continue
 
-            color = "#EAEAEA"
-            if lvl == "ERROR": color = "#FF6B6B"
-            elif lvl == "WARNING": color = "#FFD166"
-            elif lvl == "INFO": color = "#A8E6CF"
-            elif lvl == "DEBUG": color = "#B2EBF2"
+            color = _LEVEL_COLORS.get(lvl, "#EAEAEA")
 
             html = f'<pre style="margin:0;color:{color};">{self._esc(line)}</pre>'
             self.text.appendHtml(html)
@@ -3,10 +3,12 @@
 # 登录界面 (Fluent Design 重构版)
 
 import sys
-from PyQt5.QtCore import Qt, pyqtSignal, QPoint
-from PyQt5.QtGui import QColor, QFont
+import ctypes
+from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QTimer, QRectF
+from PyQt5.QtGui import QColor, QFont, QPixmap, QPainter
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QWidget, QGraphicsDropShadowEffect
+    QDialog, QVBoxLayout, QWidget,
+    QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect
 )
 
 # 引入 Fluent Widgets
@@ -19,6 +21,48 @@ from qfluentwidgets import (
     setTheme, Theme
 )
 
+# 样式常量 (模块级，只构造一次)
+_CARD_QSS = """
+    QWidget {
+        background-color: white;
+        border: 1px solid #E5E5E5;
+        border-radius: 12px;
+    }
+"""
+_SUBTITLE_COLOR = QColor(96, 96, 96)
+_HINT_COLOR = QColor(150, 150, 150)
+
+
+def _enable_dwm_shadow(win_id) -> bool:
+    """
+    Windows: 由 DWM 合成器绘制原生窗口阴影 (GPU)，替代 CPU 模糊。
+    非 Windows 或 DWM 合成不可用时返回 False，由调用方回退到贴图阴影。
+    """
+    if sys.platform != "win32":
+        return False
+
+    class MARGINS(ctypes.Structure):
+        _fields_ = [("cxLeftWidth", ctypes.c_int), ("cxRightWidth", ctypes.c_int),
+                    ("cyTopHeight", ctypes.c_int), ("cyBottomHeight", ctypes.c_int)]
+
+    DWMWA_NCRENDERING_POLICY = 2
+    DWMNCRP_ENABLED = 2
+    try:
+        dwmapi = ctypes.windll.dwmapi
+        enabled = ctypes.c_bool(False)
+        dwmapi.DwmIsCompositionEnabled(ctypes.byref(enabled))
+        if not enabled.value:
+            return False
+
+        hwnd = ctypes.c_void_p(int(win_id))
+        policy = ctypes.c_int(DWMNCRP_ENABLED)
+        dwmapi.DwmSetWindowAttribute(hwnd, DWMWA_NCRENDERING_POLICY,
+                                     ctypes.byref(policy), ctypes.sizeof(policy))
+        margins = MARGINS(-1, -1, -1, -1)
+        return dwmapi.DwmExtendFrameIntoClientArea(hwnd, ctypes.byref(margins)) == 0
+    except Exception:
+        return False
+
 
 class LoginDialog(QDialog):
     """
@@ -27,6 +71,9 @@ class LoginDialog(QDialog):
     """
     info = pyqtSignal(str)
 
+    # 预渲染的卡片阴影 (所有实例共享)，按 (宽, 高, 设备像素比) 缓存
+    _shadow_cache = {}
+
     def __init__(self, parent=None, fixed_user: str = "admin", fixed_pass: str = "123456"):
         super().__init__(parent)
         self.fixed_user = fixed_user
@@ -37,11 +84,25 @@ class LoginDialog(QDialog):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
         # 背景透明 (为了显示圆角和阴影)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        self.resize(420, 560)
+
+        # Windows 下优先使用 DWM 原生阴影，此时卡片铺满窗口、不再预留阴影边距
+        self._native_shadow = _enable_dwm_shadow(self.winId())
+        if self._native_shadow:
+            self.resize(400, 540)
+        else:
+            self.resize(420, 560)
 
         # 拖拽移动支持
         self._is_dragging = False
-        self._drag_pos = QPoint()
+        # 按下时缓存鼠标全局坐标与窗口位置，移动过程中不再查询窗口几何
+        self._press_global = QPoint()
+        self._press_origin = QPoint()
+        # 拖拽节流：约 60 Hz 合并鼠标移动，只移动到最新位置
+        self._pending_pos = None
+        self._drag_timer = QTimer(self)
+        self._drag_timer.setInterval(16)
+        self._drag_timer.setSingleShot(True)
+        self._drag_timer.timeout.connect(self._flush_drag)
 
         self._init_ui()
 
@@ -50,22 +111,16 @@ class LoginDialog(QDialog):
 
         # 2. 主容器 (卡片)
         self.card = QWidget(self)
-        self.card.setGeometry(10, 10, 400, 540)  # 留出边距给阴影
-        self.card.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border: 1px solid #E5E5E5;
-                border-radius: 12px;
-            }
-        """)
-
-        # 3. 阴影效果
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setXOffset(0)
-        shadow.setYOffset(4)
-        shadow.setColor(QColor(0, 0, 0, 30))
-        self.card.setGraphicsEffect(shadow)
+        if self._native_shadow:
+            self.card.setGeometry(0, 0, 400, 540)
+        else:
+            self.card.setGeometry(10, 10, 400, 540)  # 留出边距给阴影
+        self.card.setStyleSheet(_CARD_QSS)
+
+        # 3. 阴影效果：静态阴影只模糊一次，paintEvent 中直接贴图
+        #    (卡片上不再挂 QGraphicsDropShadowEffect，避免每帧重新模糊)
+        if not self._native_shadow:
+            self._shadow_pixmap()
 
         # 4. 垂直布局
         layout = QVBoxLayout(self.card)
@@ -82,7 +137,7 @@ class LoginDialog(QDialog):
         # --- 标题区 ---
         title = TitleLabel("NeuroPilot", self)
         subtitle = BodyLabel("运动想象上肢康复系统", self)
-        subtitle.setTextColor(QColor(96, 96, 96), QColor(96, 96, 96))  # 灰色
+        subtitle.setTextColor(_SUBTITLE_COLOR, _SUBTITLE_COLOR)  # 灰色
 
         layout.addWidget(title, 0, Qt.AlignHCenter)
         layout.addWidget(subtitle, 0, Qt.AlignHCenter)
@@ -94,7 +149,7 @@ class LoginDialog(QDialog):
         self.user_edit.setPlaceholderText("请输入账号")
         self.user_edit.setClearButtonEnabled(True)
         # 支持回车跳转
-        self.user_edit.returnPressed.connect(lambda: self.pass_edit.setFocus())
+        self.user_edit.returnPressed.connect(self._focus_pass)
 
         self.pass_edit = PasswordLineEdit(self)
         self.pass_edit.setPlaceholderText("请输入密码")
@@ -124,13 +179,63 @@ class LoginDialog(QDialog):
 
         # --- 底部提示 ---
         hint = BodyLabel(f"默认账号: {self.fixed_user} / {self.fixed_pass}", self)
-        hint.setTextColor(QColor(150, 150, 150), QColor(150, 150, 150))
+        hint.setTextColor(_HINT_COLOR, _HINT_COLOR)
         hint.setFont(QFont("Microsoft YaHei", 9))
         layout.addWidget(hint, 0, Qt.AlignHCenter)
 
         # 默认焦点
         self.user_edit.setFocus()
 
+    def _shadow_pixmap(self):
+        """取当前尺寸与屏幕像素比对应的阴影贴图，缺失时生成 (如移到不同 DPI 的屏幕)"""
+        key = (self.width(), self.height(), self.devicePixelRatioF())
+        pix = LoginDialog._shadow_cache.get(key)
+        if pix is None:
+            pix = LoginDialog._shadow_cache[key] = self._render_shadow(*key)
+        return pix
+
+    @staticmethod
+    def _render_shadow(w, h, dpr=1.0, blur=20, y_offset=4, color=QColor(0, 0, 0, 30)):
+        """生成与原 DropShadow 参数一致的阴影贴图 (圆角矩形 -> 高斯模糊)，按设备像素渲染"""
+        pw, ph = int(round(w * dpr)), int(round(h * dpr))
+        shape = QPixmap(pw, ph)
+        shape.fill(Qt.transparent)
+        p = QPainter(shape)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.scale(dpr, dpr)
+        p.setPen(Qt.NoPen)
+        p.setBrush(color)
+        p.drawRoundedRect(10, 10 + y_offset, w - 20, h - 20, 12, 12)
+        p.end()
+
+        scene = QGraphicsScene()
+        item = QGraphicsPixmapItem(shape)
+        effect = QGraphicsBlurEffect()
+        effect.setBlurRadius(blur * dpr)
+        item.setGraphicsEffect(effect)
+        scene.addItem(item)
+
+        result = QPixmap(pw, ph)
+        result.fill(Qt.transparent)
+        p = QPainter(result)
+        # 固定源/目标矩形为贴图像素大小，避免模糊外扩导致缩放
+        rect = QRectF(0, 0, pw, ph)
+        scene.render(p, rect, rect)
+        p.end()
+        # 标记像素比后按逻辑坐标绘制即为对话框大小
+        result.setDevicePixelRatio(dpr)
+        return result
+
+    def paintEvent(self, event):
+        if self._native_shadow:
+            return
+        p = QPainter(self)
+        p.drawPixmap(0, 0, self._shadow_pixmap())
+        p.end()
+
+    def _focus_pass(self):
+        self.pass_edit.setFocus()
+
     def _try_login(self):
         """验证逻辑"""
         u = self.user_edit.text().strip()
@@ -158,16 +263,27 @@ class LoginDialog(QDialog):
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             self._is_dragging = True
-            self._drag_pos = event.globalPos() - self.frameGeometry().topLeft()
+            self._press_global = event.globalPos()
+            self._press_origin = self.pos()
             event.accept()
 
     def mouseMoveEvent(self, event):
         if self._is_dragging:
-            self.move(event.globalPos() - self._drag_pos)
+            self._pending_pos = self._press_origin + (event.globalPos() - self._press_global)
+            if not self._drag_timer.isActive():
+                self._drag_timer.start()
             event.accept()
 
     def mouseReleaseEvent(self, event):
         self._is_dragging = False
+        # 松开时落到最终位置
+        self._drag_timer.stop()
+        self._flush_drag()
+
+    def _flush_drag(self):
+        if self._pending_pos is not None:
+            self.move(self._pending_pos)
+            self._pending_pos = None
 
 
 # 独立测试
@@ -178,6 +294,7 @@ if __name__ == "__main__":
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    QApplication.setAttribute(Qt.AA_CompressHighFrequencyEvents, True)
 
     app = QApplication(sys.argv)
     setTheme(Theme.LIGHT)
@@ -5,9 +5,11 @@
 import sys
 import os
 import logging
+import importlib
+from collections import deque
 
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QSize, QTimer, QRunnable, QThreadPool
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel
 
 # 引入 Fluent Widgets
 from qfluentwidgets import (
@@ -16,31 +18,75 @@ from qfluentwidgets import (
 )
 
 # 业务模块
+# 启动时只导入登录框；页面模块在 _build_pages 中 (GUI 线程) 导入。
+# 登录成功后 _ModulePreloader 先在后台线程导入其中不含 Qt/matplotlib 的纯计算依赖
 from login_dialog import LoginDialog
-from dashboard_module import DashboardPage
-from task_module import TaskModule
-from eeg_module import EEGModule
-from device_control import ControlPanel
-# 新增调试模块
-from debug_module import DebugPanel
-
-# 可选模块
-try:
-    from ml_module import MLTrainerPanel
-except ImportError:
-    MLTrainerPanel = None
-try:
-    from log_module import LogPanel
-except ImportError:
-    LogPanel = None
-try:
-    from subject_manager import SubjectManager
-except ImportError:
-    SubjectManager = None
-try:
-    from data_module import DataAnalyticsPanel
-except ImportError:
-    DataAnalyticsPanel = None
+
+# 只预导入纯 numpy/scipy/sklearn/pandas 依赖：Qt 与 matplotlib 的模块初始化
+# 不是线程安全的，页面模块本身必须留在 GUI 线程导入
+_PRELOAD_MODULES = (
+    "numpy", "scipy.linalg", "scipy.stats", "pandas", "joblib",
+    "sklearn.model_selection", "sklearn.metrics", "sklearn.preprocessing",
+    "sklearn.pipeline", "sklearn.svm", "sklearn.ensemble", "sklearn.linear_model",
+    "sklearn.neighbors", "sklearn.decomposition", "sklearn.feature_selection",
+    "sklearn.kernel_approximation",
+)
+
+
+class _ModulePreloader(QRunnable):
+    """后台预导入页面模块的纯计算依赖；导入失败留到真正使用时再处理"""
+
+    def __init__(self, names):
+        super().__init__()
+        self.names = names
+
+    def run(self):
+        for name in self.names:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+
+def _import_optional(module: str, attr: str):
+    """可选模块：导入失败返回 None"""
+    try:
+        return getattr(importlib.import_module(module), attr)
+    except ImportError:
+        return None
+
+
+class _LazyPage(QWidget):
+    """
+    导航占位页：注册到导航栏时只是一个空容器，
+    首次切换到该页时才调用 factory 构建真实页面并放入自身布局
+    """
+
+    def __init__(self, object_name, factory, on_built=None, parent=None):
+        super().__init__(parent)
+        self.setObjectName(object_name)
+        self._factory = factory
+        self._on_built = on_built
+        self.page = None
+
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_built(self):
+        if self.page is not None or self._factory is None:
+            return self.page
+        factory, self._factory = self._factory, None
+        try:
+            page = factory()
+        except Exception as e:
+            self._layout.addWidget(QLabel(f"页面加载失败: {e}"), 0, Qt.AlignCenter)
+            return None
+
+        self.page = page
+        self._layout.addWidget(page)
+        if self._on_built:
+            self._on_built(page)
+        return page
 
 
 class MainWindow(FluentWindow):
@@ -52,8 +98,27 @@ class MainWindow(FluentWindow):
         # 1. 窗口基础设置
         self.init_window()
 
+        # 先让启动页完成绘制，再在下一轮事件循环中构建页面
+        self.splashScreen.repaint()
+        QApplication.processEvents()
+        QTimer.singleShot(0, self._build_pages)
+
+    def _build_pages(self):
+        # 页面模块在 GUI 线程导入；其 numpy/sklearn 依赖多已由 _ModulePreloader 预导入，
+        # 若仍在导入中，Python 的模块导入锁会在此等待其完成，不会重复执行
+        from dashboard_module import DashboardPage
+        from task_module import TaskModule
+        from eeg_module import EEGModule
+        from device_control import ControlPanel
+        from debug_module import DebugPanel
+        # 可选页面必须真正导入成功 (如缺少 sklearn 时 ml_module 导入失败) 才出现在导航栏
+        MLTrainerPanel = _import_optional("ml_module", "MLTrainerPanel")
+        SubjectManager = _import_optional("subject_manager", "SubjectManager")
+        LogPanel = _import_optional("log_module", "LogPanel")
+        DataAnalyticsPanel = _import_optional("data_module", "DataAnalyticsPanel")
+
         # 2. 实例化子页面
-        self.dashboard_page = DashboardPage(username)
+        self.dashboard_page = DashboardPage(self.username)
         self.dashboard_page.setObjectName("dashboardInterface")
 
         self.task_page = TaskModule()
@@ -65,24 +130,25 @@ class MainWindow(FluentWindow):
         self.device_page = ControlPanel()
         self.device_page.setObjectName("deviceInterface")
 
-        # [Phase 14] 调试模块
-        self.debug_page = DebugPanel()
-        self.debug_page.setObjectName("debugInterface")
-
-        self.ml_page = None
-        if MLTrainerPanel:
-            self.ml_page = MLTrainerPanel()
-            self.ml_page.setObjectName("mlInterface")
-
+        # 数据分析页负责试次入库，需要从一开始就接收信号，保持立即构建
         self.data_page = None
         if DataAnalyticsPanel:
             self.data_page = DataAnalyticsPanel()
             self.data_page.setObjectName("dataInterface")
 
+        # [Phase 14] 调试模块：需要从一开始就接收串口/LSL 流量，保持立即构建
+        self.debug_page = DebugPanel()
+        self.debug_page.setObjectName("debugInterface")
+
+        # 按需页面：先注册占位页，首次打开时再构建 (真实页面见 self.xxx_page)
+        self.ml_page = None
         self.subject_page = None
+        self._ml_lazy = None
+        if MLTrainerPanel:
+            self._ml_lazy = _LazyPage("mlInterface", MLTrainerPanel, self._bind_ml_page)
+        self._subject_lazy = None
         if SubjectManager:
-            self.subject_page = SubjectManager()
-            self.subject_page.setObjectName("subjectInterface")
+            self._subject_lazy = _LazyPage("subjectInterface", SubjectManager, self._bind_subject_page)
 
         self.log_page = None
         if LogPanel:
@@ -114,6 +180,22 @@ class MainWindow(FluentWindow):
         self.show()
 
     def init_navigation(self):
+        # 批量注册导航项：期间暂停重绘并屏蔽选中信号，结束后统一布局一次
+        self.navigationInterface.setUpdatesEnabled(False)
+        self.stackedWidget.setUpdatesEnabled(False)
+        self.navigationInterface.blockSignals(True)
+        try:
+            self._add_navigation_items()
+        finally:
+            self.navigationInterface.blockSignals(False)
+            self.stackedWidget.setUpdatesEnabled(True)
+            self.navigationInterface.setUpdatesEnabled(True)
+            self.navigationInterface.update()
+
+        # 切换到占位页时构建真实页面
+        self.stackedWidget.currentChanged.connect(self._on_page_changed)
+
+    def _add_navigation_items(self):
         # 首页
         self.addSubInterface(self.dashboard_page, FIF.HOME, '仪表盘')
 
@@ -123,8 +205,8 @@ class MainWindow(FluentWindow):
         self.addSubInterface(self.device_page, FIF.IOT, '外设控制')
 
         # 数据与分析
-        if self.ml_page:
-            self.addSubInterface(self.ml_page, FIF.EDUCATION, '模型训练')
+        if self._ml_lazy:
+            self.addSubInterface(self._ml_lazy, FIF.EDUCATION, '模型训练')
         if self.data_page:
             # [FIXED] 使用有效的图标
             self.addSubInterface(self.data_page, FIF.MARKET, '数据分析')
@@ -133,8 +215,8 @@ class MainWindow(FluentWindow):
         self.addSubInterface(self.debug_page, FIF.DEVELOPER_TOOLS, '调试控制台')
 
         # 管理
-        if self.subject_page:
-            self.addSubInterface(self.subject_page, FIF.PEOPLE, '受试者管理')
+        if self._subject_lazy:
+            self.addSubInterface(self._subject_lazy, FIF.PEOPLE, '受试者管理')
 
         # 底部
         if self.log_page:
@@ -157,16 +239,19 @@ class MainWindow(FluentWindow):
         self.dashboard_page.bind_eeg_module(self.eeg_page)
         self.dashboard_page.bind_device_control(self.device_page)
 
-        # 日志聚合
-        def log_proxy(text):
-            self.logger.info(text)
-            if self.log_page:
-                self.log_page.append_record("System", "INFO", text)
+        # 日志聚合：先入队，由定时器约 10 Hz 批量写入 logger (日志面板经 logger 接收)
+        # 不设上限：突发日志在两次 flush 之间不丢弃
+        self._log_buffer = deque()
+        self._log_info_wanted = True
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(100)
+        self._log_timer.timeout.connect(self._flush_logs)
+        self._log_timer.start()
 
         for p in [self.dashboard_page, self.task_page, self.eeg_page,
-                  self.device_page, self.ml_page, self.data_page, self.log_page, self.debug_page]:
+                  self.device_page, self.data_page, self.log_page]:
             if p and hasattr(p, 'info'):
-                p.info.connect(log_proxy)
+                p.info.connect(self._enqueue_log)
 
         # 范式联动
         self.task_page.stage.connect(self.on_stage_changed)
@@ -177,30 +262,94 @@ class MainWindow(FluentWindow):
             self.device_page.send_result.connect(self.data_page.notify_device_send)
 
         # 设备反馈
-        self.device_page.device_feedback.connect(lambda s: log_proxy(f"Device: {s}"))
+        self.device_page.device_feedback.connect(self._on_device_feedback)
         self.device_page.send_result.connect(self.on_device_send)
 
+        self._bind_debug_page(self.debug_page)
+
+        # 试次热路径上用到的能力探测只做一次
+        self._has_send_trigger = hasattr(self.device_page, "sendTrigger")
+        self._has_send_trigger_end = hasattr(self.device_page, "sendTrigger_end")
+        self._has_trial_result = hasattr(self.device_page, "handle_trial_result")
+
+        if self.log_page:
+            self.log_page.attach_python_logging(self.logger)
+        elif not (sys.stdout and sys.stdout.isatty()):
+            # 既无日志面板、stdout 也不是终端：控制台输出的 INFO 无人查看，只提高控制台 handler 的级别；
+            # logger 本身保持 INFO，文件等其他 handler 照常记录
+            for h in self.logger.handlers:
+                if type(h) is logging.StreamHandler and h.stream is sys.stdout:
+                    h.setLevel(logging.WARNING)
+        # 级别调整完成后判定一次：是否有 handler 会接收 INFO
+        self._log_info_wanted = self._info_has_consumer()
+
+    def _info_has_consumer(self):
+        # 沿 logger 传播链检查各 handler 的级别，任一可接收 INFO 即视为有消费者
+        lg = self.logger
+        if not lg.isEnabledFor(logging.INFO):
+            return False
+        while lg:
+            if any(h.level <= logging.INFO for h in lg.handlers):
+                return True
+            if not lg.propagate:
+                break
+            lg = lg.parent
+        return False
+
+    def _enqueue_log(self, fmt, *args):
+        # 入队 (格式串, 参数)，格式化推迟到 flush，且仅在有消费者时进行
+        if self._log_info_wanted:
+            self._log_buffer.append((fmt, args))
+
+    def _on_device_feedback(self, s):
+        self._enqueue_log("Device: %s", s)
+
+    def _flush_logs(self):
+        if not self._log_buffer:
+            return
+        items = list(self._log_buffer)
+        self._log_buffer.clear()
+
+        # 逐条写入 logger，保留每条消息独立的时间戳与行结构；
+        # 日志面板已通过 attach_python_logging 接入 logger，不再另行回灌，避免重复显示
+        for fmt, args in items:
+            self.logger.info(fmt, *args)
+
+    # ---------- 按需页面 ----------
+    def _on_page_changed(self, index):
+        w = self.stackedWidget.currentWidget()
+        if isinstance(w, _LazyPage):
+            w.ensure_built()
+
+    def _bind_debug_page(self, page):
+        page.info.connect(self._enqueue_log)
+
         # [Phase 14] 调试信号集成
         # 1. Device Traffic -> Debug Log
-        self.device_page.backend.sig_traffic.connect(self.debug_page.append_device_log)
+        self.device_page.backend.sig_traffic.connect(page.append_device_log)
 
         # 2. EEG Traffic -> Debug Log
         # 注意: eeg_page.worker 是在 __init__ 中创建的 QObject，可以直接访问
-        self.eeg_page.worker.sig_traffic_monitor.connect(self.debug_page.append_eeg_log)
+        self.eeg_page.worker.sig_traffic_monitor.connect(page.append_eeg_log)
 
         # 3. Debug Send -> Device Backend
-        self.debug_page.request_send_device.connect(self.device_page.backend.send_data)
+        page.request_send_device.connect(self.device_page.backend.send_data)
 
-        if self.log_page:
-            self.log_page.attach_python_logging(self.logger)
+    def _bind_ml_page(self, page):
+        self.ml_page = page
+        if hasattr(page, 'info'):
+            page.info.connect(self._enqueue_log)
+
+    def _bind_subject_page(self, page):
+        self.subject_page = page
 
-    def on_stage_changed(self, name, idx):
+    def _is_left_intent(self) -> bool:
+        task = getattr(self.task_page, "task", None)
+        return task.currentIndex() == 0 if task is not None else True
+
+    def on_stage_changed(self, name, idx, t=None):
         # 意图判断
-        try:
-            is_left = (self.task_page.task.currentIndex() == 0)
-            label = "left" if is_left else "right"
-        except:
-            label = "left"
+        label = "left" if self._is_left_intent() else "right"
 
         if name == "运动想象":
             # 记录数据 (Data Module)
@@ -214,31 +363,23 @@ class MainWindow(FluentWindow):
                     self.task_page.rest.value()
                 )
 
-            if hasattr(self.device_page, "sendTrigger"):
+            if self._has_send_trigger:
                 self.device_page.sendTrigger()
             self.eeg_page.begin_trial(label)
 
         elif name == "休息结束":
             self.eeg_page.end_trial(label)
-            if hasattr(self.device_page, "sendTrigger_end"):
+            if self._has_send_trigger_end:
                 self.device_page.sendTrigger_end()
 
     def on_trial_result(self, pred, success):
-        try:
-            intended = "左手" if self.task_page.task.currentIndex() == 0 else "右手"
-            self.task_page.notify_trial_result(pred, success, intended)
-        except:
-            pass
-        try:
+        intended = "左手" if self._is_left_intent() else "右手"
+        self.task_page.notify_trial_result(pred, success, intended)
+        if self._has_trial_result:
             self.device_page.handle_trial_result(pred, success)
-        except:
-            pass
 
     def on_device_send(self, ok, msg):
-        try:
-            self.task_page.notify_device_send(ok, msg)
-        except:
-            pass
+        self.task_page.notify_device_send(ok, msg)
 
 
 def main():
@@ -246,6 +387,8 @@ def main():
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    # 合并高频输入事件 (鼠标移动等)
+    QApplication.setAttribute(Qt.AA_CompressHighFrequencyEvents, True)
 
     app = QApplication(sys.argv)
     setTheme(Theme.LIGHT)
@@ -257,6 +400,9 @@ def main():
 
     username = login.user_edit.text() or "User"
 
+    # 登录成功后立即在后台预导入各页面模块，与启动页绘制重叠
+    QThreadPool.globalInstance().start(_ModulePreloader(_PRELOAD_MODULES))
+
     w = MainWindow(username)
     w.show()
 
@@ -5,9 +5,12 @@
 # 状态：Final Release
 
 import os
-import io
+import re
+import ast
+import functools
 import pickle
 import logging
+import joblib
 import numpy as np
 
 try:
@@ -15,7 +18,14 @@ try:
 except Exception:
     pd = None
 
-from PyQt5.QtCore import Qt, pyqtSignal
+# 模型文件压缩：优先 LZ4 (解压快)，未安装 lz4 时用 zlib
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESS = ("lz4", 3)
+except Exception:
+    MODEL_COMPRESS = ("zlib", 3)
+
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QRunnable, QThreadPool
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFileDialog
 )
@@ -42,43 +52,147 @@ from matplotlib.figure import Figure
 
 # --- Scikit-learn ---
 from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold, learning_curve
-from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc
-from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc, ConfusionMatrixDisplay, \
+    get_scorer
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler, FunctionTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.svm import SVC
+from sklearn.svm import SVC, LinearSVC
+from sklearn.kernel_approximation import Nystroem
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.feature_selection import SelectKBest, f_classif, mutual_info_classif
 from sklearn.decomposition import PCA
 
+PIPELINE_CACHE_DIR = os.path.join("data", "cache", "pipeline")
+# 大样本模式：样本数超过该阈值时 SVM (RBF) 改用 Nystroem 近似核 + 线性 SVM
+LARGE_N_THRESHOLD = 3000
+
+# --- 可选：贝叶斯超参搜索 (scikit-optimize) ---
+try:
+    from skopt import BayesSearchCV
+    from skopt.space import Real, Integer, Categorical
+except Exception:
+    BayesSearchCV = None
+
+
+_KV_RE = re.compile(r"\s*([^=;]+?)\s*=\s*([^;]+)")
+
+
+def _parse_token(token: str):
+    """数值/布尔/None/带引号字符串按字面量解析，其余按普通字符串 (如 scale)"""
+    try:
+        return ast.literal_eval(token)
+    except (ValueError, SyntaxError):
+        return token
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_grid_cached(grid_text: str):
+    items = []
+    for m in _KV_RE.finditer(grid_text):
+        vals = tuple(_parse_token(t) for t in (t.strip() for t in m.group(2).split(",")) if t)
+        if vals:
+            items.append((m.group(1), vals))
+    return tuple(items)
+
 
 def _parse_param_grid(grid_text: str):
-    """解析简易网格字符串 -> dict"""
-    grid = {}
+    """解析简易网格字符串 -> dict (例: "C=0.1,1,10; gamma=scale,auto")"""
     if not grid_text or not grid_text.strip():
-        return grid
-    parts = grid_text.split(";")
-    for p in parts:
-        p = p.strip()
-        if not p or "=" not in p:
-            continue
-        k, v = p.split("=", 1)
-        k = k.strip()
-        vals = []
-        for token in v.split(","):
-            token = token.strip()
-            if token == "": continue
-            try:
-                if "." in token:
-                    vals.append(float(token))
-                else:
-                    vals.append(int(token))
-            except:
-                vals.append(token)
-        if vals:
-            grid[k] = vals
-    return grid
+        return {}
+    # 缓存的是不可变结果，每次返回新的 dict/list，调用方可自由修改
+    return {k: list(v) for k, v in _parse_grid_cached(grid_text)}
+
+
+def _grid_to_search_space(grid: dict):
+    """
+    简易网格 -> skopt 搜索空间：
+    数值列表 (>=2 个) 取 [min, max] 连续区间 (跨度 >= 100 倍时按对数尺度)，其余作为类别
+    """
+    space = {}
+    for k, vals in grid.items():
+        nums = [v for v in vals if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if len(vals) >= 2 and len(nums) == len(vals):
+            lo, hi = min(nums), max(nums)
+            if lo == hi:
+                space[k] = Categorical([lo])
+            elif all(isinstance(v, int) for v in nums):
+                space[k] = Integer(lo, hi)
+            else:
+                prior = "log-uniform" if lo > 0 and hi / lo >= 100 else "uniform"
+                space[k] = Real(float(lo), float(hi), prior=prior)
+        else:
+            space[k] = Categorical(list(vals))
+    return space
+
+
+def _to_float32(a):
+    """PCA 等步骤可能输出 float64，统一回 float32 (模块级函数，保证模型可 pickle)"""
+    return np.asarray(a, dtype=np.float32)
+
+
+class _FixedScores:
+    """SelectKBest 的常量打分函数：返回预先算好的特征得分，忽略各折数据 (模块级类，可 pickle)"""
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def __call__(self, X, y):
+        return self.scores
+
+
+class _WarmStartForestSearch:
+    """
+    随机森林 n_estimators 网格的增量搜索 (接口与 GridSearchCV 的 fit/best_* 一致)：
+    每折按 n_estimators 升序 warm_start 追加新树，而不是每个取值都从头训练
+    """
+
+    def __init__(self, pipe, grid, scoring, folds):
+        self.pipe = pipe
+        self.n_list = sorted(grid["clf__n_estimators"])
+        self.fixed = {k: v[0] for k, v in grid.items() if k != "clf__n_estimators"}
+        self.scorer = get_scorer(scoring)
+        self.folds = folds
+
+    def fit(self, X, y):
+        scores = np.zeros((len(self.folds), len(self.n_list)))
+        for f, (tr, va) in enumerate(self.folds):
+            est = clone(self.pipe).set_params(clf__warm_start=True, **self.fixed)
+            for j, n in enumerate(self.n_list):
+                est.set_params(clf__n_estimators=n)
+                est.fit(X[tr], y[tr])
+                scores[f, j] = self.scorer(est, X[va], y[va])
+
+        mean = scores.mean(axis=0)
+        best = int(np.argmax(mean))
+        self.best_params_ = dict(self.fixed, clf__n_estimators=self.n_list[best])
+        self.best_score_ = float(mean[best])
+        self.best_estimator_ = clone(self.pipe).set_params(**self.best_params_).fit(X, y)
+        return self
+
+
+class _JobSignals(QObject):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class _FitJob(QRunnable):
+    """在线程池中执行耗时的 sklearn 调用 (fit / learning_curve)，结果经信号回到 GUI 线程"""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = _JobSignals()
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.done.emit(result)
 
 
 class MplCanvas(FigureCanvas):
@@ -95,8 +209,69 @@ class MplCanvas(FigureCanvas):
         self.ax_lc = self.fig.add_subplot(2, 2, 3)
         self.ax_cmp = self.fig.add_subplot(2, 2, 4)
 
+        # 持久化的曲线 / 柱状图对象：刷新时只更新数据，不再 clear() 重建 Artist
+        self._roc_lines = []
+        self._roc_diag = self.ax_roc.plot([0, 1], [0, 1], 'k--', alpha=0.3)[0]
+        self._roc_diag.set_visible(False)
+        self._lc_train = self.ax_lc.plot([], [], 'o-', color="#4ECDC4", label="Train")[0]
+        self._lc_val = self.ax_lc.plot([], [], 's-', color="#FF6B6B", label="Valid")[0]
+        self._cmp_bars = None
+        self.ax_cmp.set_ylim(0, 1.05)
+
         super().__init__(self.fig)
 
+    def set_roc(self, curves):
+        """curves: [(fpr, tpr, label), ...]；复用已有 Line2D，多余的隐藏"""
+        ax = self.ax_roc
+        while len(self._roc_lines) < len(curves):
+            self._roc_lines.append(ax.plot([], [])[0])
+        for i, line in enumerate(self._roc_lines):
+            if i < len(curves):
+                fpr, tpr, label = curves[i]
+                line.set_data(fpr, tpr)
+                line.set_label(label)
+                line.set_color("#FF6B6B" if len(curves) == 1 else f"C{i}")
+                line.set_visible(True)
+            else:
+                line.set_visible(False)
+                line.set_label("_nolegend_")
+        self._roc_diag.set_visible(bool(curves))
+        if curves:
+            ax.legend(fontsize=8)
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+
+    def set_learning_curve(self, sizes, train_scores, val_scores):
+        self._lc_train.set_data(sizes, train_scores)
+        self._lc_val.set_data(sizes, val_scores)
+        if len(sizes) and self.ax_lc.get_legend() is None:
+            self.ax_lc.legend(fontsize=8)
+        self.ax_lc.relim()
+        self.ax_lc.autoscale_view()
+
+    def set_comparison(self, names, scores):
+        """柱数不变时只改高度；候选集合变化才重建柱子"""
+        ax = self.ax_cmp
+        if self._cmp_bars is not None and len(self._cmp_bars) == len(scores):
+            for rect, h in zip(self._cmp_bars, scores):
+                rect.set_height(h)
+        else:
+            if self._cmp_bars is not None:
+                self._cmp_bars.remove()
+            colors = ['#4ECDC4', '#FF6B6B', '#C7F464', '#556270', '#C44D58', '#F8B195']
+            self._cmp_bars = ax.bar(range(len(scores)), scores, color=colors)
+            ax.set_xlim(-0.5, len(scores) - 0.5)
+        ax.set_xticks(range(len(names)))
+        ax.set_xticklabels(names)
+
+    def clear_results(self):
+        """开始新一轮训练：清空混淆矩阵，隐藏 ROC 与学习曲线"""
+        self.ax_cm.clear()
+        self.set_roc([])
+        self.set_learning_curve([], [], [])
+
 
 class MLTrainerPanel(QWidget):
     """
@@ -115,6 +290,16 @@ class MLTrainerPanel(QWidget):
         self.classes_ = None
         self.model = None
         self._last_split = None
+        # 划分/标准化缓存：(X 引用, test_size, 结果)，训练与批量对比共用
+        self._split_cache = None
+        self._scaled_cache = None
+        # 交叉验证折索引缓存：{(id(X), cv): (X 引用, folds)}
+        self._cv_folds = {}
+        # 预计算的互信息得分：(训练集引用, scores)
+        self._mi_cache = None
+        # 后台训练任务 (同一时刻只允许一个)
+        self._job = None
+        self._job_fail_title = ""
 
         self._init_ui()
 
@@ -220,7 +405,7 @@ class MLTrainerPanel(QWidget):
         l_algo.addWidget(StrongBodyLabel("⚙️ 算法配置", self))
 
         self.cmb_algo = ComboBox()
-        self.cmb_algo.addItems(["SVM (RBF)", "SVM (Linear)", "KNN", "LogisticRegression", "RandomForest"])
+        self.cmb_algo.addItems(["SVM (RBF)", "SVM (Linear)", "KNN", "LogisticRegression", "RandomForest", "HistGBT"])
         self.cmb_algo.currentIndexChanged.connect(self._on_algo_changed)
 
         self.ed_grid = LineEdit()
@@ -239,11 +424,26 @@ class MLTrainerPanel(QWidget):
         row_cv.addWidget(CaptionLabel("评分:", self))
         row_cv.addWidget(self.cmb_score)
 
+        row_search = QHBoxLayout()
+        self.cmb_search = ComboBox()
+        self.cmb_search.addItems(["网格搜索 (Grid)", "贝叶斯优化 (Bayes)"])
+        self.spin_iter = SpinBox()
+        self.spin_iter.setRange(5, 500)
+        self.spin_iter.setFixedWidth(100)
+        row_search.addWidget(CaptionLabel("搜索:", self))
+        row_search.addWidget(self.cmb_search, 1)
+        row_search.addWidget(CaptionLabel("迭代:", self))
+        row_search.addWidget(self.spin_iter)
+
         l_algo.addWidget(CaptionLabel("分类器模型:", self))
         l_algo.addWidget(self.cmb_algo)
         l_algo.addWidget(CaptionLabel("参数网格 (分号分隔):", self))
         l_algo.addWidget(self.ed_grid)
         l_algo.addLayout(row_cv)
+        l_algo.addLayout(row_search)
+
+        self.chk_large_n = CheckBox(f"大样本模式 (N>{LARGE_N_THRESHOLD} 时 RBF 用 Nystroem 近似)")
+        l_algo.addWidget(self.chk_large_n)
         l_algo.addStretch(1)
 
         row_algo.addWidget(self.algo_card, 1)
@@ -269,6 +469,9 @@ class MLTrainerPanel(QWidget):
         row_k.addWidget(CaptionLabel("k=", self))
         row_k.addWidget(self.spin_k)
 
+        # 互信息估计 (k-NN) 代价很高：在训练集上算一次，不随网格点 × 折数重复计算
+        self.chk_mi_pre = CheckBox("互信息得分预计算 (训练集一次)")
+
         # PCA
         row_pca = QHBoxLayout()
         self.chk_pca = CheckBox("PCA 降维")
@@ -278,9 +481,14 @@ class MLTrainerPanel(QWidget):
         row_pca.addWidget(CaptionLabel("n_comp=", self))
         row_pca.addWidget(self.spin_pca)
 
+        # 预处理缓存：网格各点只改变 clf__* 参数，前置步骤的拟合结果可复用
+        self.chk_cache = CheckBox("缓存预处理结果 (Pipeline memory)")
+
         l_feat.addWidget(self.chk_standardize)
         l_feat.addLayout(row_k)
+        l_feat.addWidget(self.chk_mi_pre)
         l_feat.addLayout(row_pca)
+        l_feat.addWidget(self.chk_cache)
         l_feat.addStretch(1)
 
         row_algo.addWidget(self.feat_card, 1)
@@ -327,6 +535,7 @@ class MLTrainerPanel(QWidget):
         self.chk_cmp_knn = CheckBox("KNN")
         self.chk_cmp_lr = CheckBox("LogReg")
         self.chk_cmp_rf = CheckBox("RF")
+        self.chk_cmp_hgb = CheckBox("HistGBT")
 
         self.btn_cmp = PrimaryPushButton(FIF.SYNC, "运行对比", self)
 
@@ -335,6 +544,7 @@ class MLTrainerPanel(QWidget):
         row_cmp.addWidget(self.chk_cmp_knn)
         row_cmp.addWidget(self.chk_cmp_lr)
         row_cmp.addWidget(self.chk_cmp_rf)
+        row_cmp.addWidget(self.chk_cmp_hgb)
         row_cmp.addStretch(1)
         row_cmp.addWidget(self.btn_cmp)
 
@@ -357,6 +567,10 @@ class MLTrainerPanel(QWidget):
             "TextEdit { background: #FAFAFA; border: none; border-bottom: 1px solid #E5E5E5; }")
 
         self.canvas = MplCanvas(width=10, height=8, dpi=100)
+        # ROC / 学习曲线 / 对比图的 Artist 常驻，样式只需设置一次
+        self._style_axis(self.canvas.ax_roc, "ROC Curve")
+        self._style_axis(self.canvas.ax_lc, "Learning Curve")
+        self._style_axis(self.canvas.ax_cmp, "Batch Comparison")
 
         l_res.addWidget(self.txt_report)
         l_res.addWidget(self.canvas)
@@ -374,6 +588,7 @@ class MLTrainerPanel(QWidget):
         self.btn_cmp.clicked.connect(self._run_comparison)
 
         os.makedirs("data/models", exist_ok=True)
+        os.makedirs(PIPELINE_CACHE_DIR, exist_ok=True)
 
     # ======================================================
     # 配置持久化 (Phase 12)
@@ -389,12 +604,17 @@ class MLTrainerPanel(QWidget):
         default_grid = "C=0.1,1,10; gamma=scale,auto"
         self.ed_grid.setText(cfg.get("ML", "grid", default_grid, str))
         self.cv_spin.setValue(cfg.get("ML", "cv", 5, int))
+        self.cmb_search.setCurrentIndex(cfg.get("ML", "search_idx", 0, int))
+        self.spin_iter.setValue(cfg.get("ML", "n_iter", 25, int))
+        self.chk_large_n.setChecked(cfg.get("ML", "large_n", False, bool))
 
         self.chk_standardize.setChecked(cfg.get("ML", "std", True, bool))
         self.chk_kbest.setChecked(cfg.get("ML", "kbest", False, bool))
+        self.chk_mi_pre.setChecked(cfg.get("ML", "mi_pre", True, bool))
         self.spin_k.setValue(cfg.get("ML", "k", 20, int))
         self.chk_pca.setChecked(cfg.get("ML", "pca", False, bool))
         self.spin_pca.setValue(cfg.get("ML", "n_pca", 10, int))
+        self.chk_cache.setChecked(cfg.get("ML", "cache", False, bool))
 
     def closeEvent(self, e):
         """关闭时保存配置"""
@@ -405,12 +625,17 @@ class MLTrainerPanel(QWidget):
         cfg.set("ML", "algo_idx", self.cmb_algo.currentIndex())
         cfg.set("ML", "grid", self.ed_grid.text())
         cfg.set("ML", "cv", self.cv_spin.value())
+        cfg.set("ML", "search_idx", self.cmb_search.currentIndex())
+        cfg.set("ML", "n_iter", self.spin_iter.value())
+        cfg.set("ML", "large_n", self.chk_large_n.isChecked())
 
         cfg.set("ML", "std", self.chk_standardize.isChecked())
         cfg.set("ML", "kbest", self.chk_kbest.isChecked())
+        cfg.set("ML", "mi_pre", self.chk_mi_pre.isChecked())
         cfg.set("ML", "k", self.spin_k.value())
         cfg.set("ML", "pca", self.chk_pca.isChecked())
         cfg.set("ML", "n_pca", self.spin_pca.value())
+        cfg.set("ML", "cache", self.chk_cache.isChecked())
 
         super().closeEvent(e)
 
@@ -445,10 +670,8 @@ class MLTrainerPanel(QWidget):
         ax.grid(True, linestyle='--', alpha=0.3, color='#C0C0C0')
 
     def _clear_axes(self):
-        self.canvas.ax_cm.clear()
-        self.canvas.ax_roc.clear()
-        self.canvas.ax_lc.clear()
-        self.canvas.draw()
+        self.canvas.clear_results()
+        self.canvas.draw_idle()
 
     # ======================================================
     # 业务逻辑
@@ -466,21 +689,40 @@ class MLTrainerPanel(QWidget):
         path, _ = QFileDialog.getOpenFileName(self, "选择特征CSV", "data", "CSV Files (*.csv)")
         if not path: return
         try:
-            self.df = pd.read_csv(path)
+            self.df = self._read_feature_csv(path)
             self._show_msg("成功", f"CSV已载入: {os.path.basename(path)} {self.df.shape}")
             self._extract_Xy()
         except Exception as e:
             self._show_msg("失败", str(e), False)
 
+    def _read_feature_csv(self, path):
+        """
+        特征列直接按 float32 读入 (目标列保持原类型)，省去 float64 中间副本；
+        优先用多线程的 pyarrow 引擎，不可用时回退 C 引擎
+        """
+        target = self.ed_target.text().strip() or "label"
+        cols = pd.read_csv(path, nrows=0).columns
+        dtype = {c: np.float32 for c in cols if c != target}
+        try:
+            return pd.read_csv(path, engine="pyarrow", dtype=dtype)
+        except Exception:
+            pass
+        try:
+            return pd.read_csv(path, dtype=dtype, memory_map=True)
+        except (ValueError, TypeError):
+            # 存在非数值特征列：按默认类型读取，由 _extract_Xy 处理
+            return pd.read_csv(path, memory_map=True)
+
     def _gen_demo(self):
         n = 300
-        rng = np.random.RandomState(0)
-        mu0 = np.zeros(12)
-        mu1 = np.r_[np.ones(6) * 0.8, np.ones(6) * -0.8]
-        cov = 0.3 * np.eye(12)
-        X0 = rng.multivariate_normal(mu0, cov, size=n // 2)
-        X1 = rng.multivariate_normal(mu1, cov, size=n // 2)
-        X = np.vstack([X0, X1]).astype(np.float32)
+        rng = np.random.default_rng(0)
+        mu0 = np.zeros(12, dtype=np.float32)
+        mu1 = np.r_[np.ones(6) * 0.8, np.ones(6) * -0.8].astype(np.float32)
+        # 协方差为各向同性 0.3·I，直接缩放标准正态即可，无需 multivariate_normal 的分解
+        sigma = np.float32(np.sqrt(0.3))
+        X = rng.standard_normal((n // 2 * 2, 12), dtype=np.float32) * sigma
+        X[:n // 2] += mu0
+        X[n // 2:] += mu1
         y = np.array([0] * (n // 2) + [1] * (n // 2))
 
         if pd is None:
@@ -500,9 +742,9 @@ class MLTrainerPanel(QWidget):
         if self.df is None:
             self._show_msg("提示", "请先导入数据", False)
             return
-        buf = io.StringIO()
-        self.df.head(10).to_string(buf, index=False)
-        self.txt_report.setPlainText(f"数据预览 (前10行):\n{buf.getvalue()}")
+        # 限制列数与单元格宽度，上千列的特征表也只渲染有限的文本
+        preview = self.df.iloc[:10].to_string(index=False, max_cols=30, max_colwidth=24)
+        self.txt_report.setPlainText(f"数据预览 (前10行):\n{preview}")
 
     def _extract_Xy(self):
         if self.df is None: return
@@ -517,7 +759,7 @@ class MLTrainerPanel(QWidget):
         else:
             feats = [c for c in self.df.columns if c != target]
 
-        X = self.df[feats].values.astype(np.float32)
+        X = np.ascontiguousarray(self.df[feats].to_numpy(dtype=np.float32))
         y_raw = self.df[target].values
         classes, y_enc = np.unique(y_raw, return_inverse=True)
         self.X, self.y = X, y_enc
@@ -528,21 +770,38 @@ class MLTrainerPanel(QWidget):
         steps = []
         if self.chk_kbest.isChecked():
             k = self.spin_k.value()
-            sc = f_classif if self.cmb_kbest_score.currentText() == "f_classif" else mutual_info_classif
+            if self.cmb_kbest_score.currentText() == "f_classif":
+                sc = f_classif
+            else:
+                # 勾选预计算时，后台任务在训练集上算好得分后替换为 _FixedScores (见 _apply_mi_scores)
+                sc = mutual_info_classif
             steps.append(("select", SelectKBest(score_func=sc, k=k)))
         if self.chk_standardize.isChecked():
             steps.append(("scaler", StandardScaler()))
         if self.chk_pca.isChecked():
             steps.append(("pca", PCA(n_components=self.spin_pca.value(), random_state=0)))
+            steps.append(("f32", FunctionTransformer(_to_float32)))
 
         name = self.cmb_algo.currentText()
         grid_user = _parse_param_grid(self.ed_grid.text())
 
-        if name == "SVM (RBF)":
-            est = SVC(kernel="rbf", probability=True, random_state=0)
+        # Platt 概率校准会在每个网格点额外做 5 折拟合；ROC 改用 decision_function，
+        # 仅当评分本身需要概率 (roc_auc_ovr) 时才开启
+        need_proba = self.cmb_score.currentText() == "roc_auc_ovr"
+
+        large_n = (name == "SVM (RBF)" and self.chk_large_n.isChecked()
+                   and self.y is not None and len(self.y) > LARGE_N_THRESHOLD)
+
+        if large_n:
+            # 近似 RBF 核映射 + liblinear，拟合代价随样本数近似线性增长
+            steps.append(("rbf", Nystroem(gamma=None, n_components=300, random_state=0)))
+            est = LinearSVC(C=1.0, dual=False)
+            defs = {"clf__C": [1.0]}
+        elif name == "SVM (RBF)":
+            est = SVC(kernel="rbf", probability=need_proba, random_state=0, cache_size=500)
             defs = {"clf__C": [1.0], "clf__gamma": ["scale"]}
         elif name == "SVM (Linear)":
-            est = SVC(kernel="linear", probability=True, random_state=0)
+            est = SVC(kernel="linear", probability=need_proba, random_state=0, cache_size=500)
             defs = {"clf__C": [1.0]}
         elif name == "KNN":
             est = KNeighborsClassifier()
@@ -551,38 +810,205 @@ class MLTrainerPanel(QWidget):
             est = LogisticRegression(max_iter=300, random_state=0)
             defs = {"clf__C": [1.0]}
         elif name == "RandomForest":
+            # 内部并行度由 _make_search 按搜索规模决定
             est = RandomForestClassifier(random_state=0)
             defs = {"clf__n_estimators": [100]}
+        elif name == "HistGBT":
+            # 直方图梯度提升：分箱后按特征直方图分裂，建树由 OpenMP 并行，通常远快于 RF
+            est = HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1,
+                                                 early_stopping=True, random_state=0)
+            defs = {"clf__learning_rate": [0.05, 0.1], "clf__max_leaf_nodes": [15, 31]}
         else:
-            est = SVC(probability=True)
+            est = SVC(probability=need_proba)
             defs = {}
 
+        # 有前置步骤且勾选缓存时，SelectKBest/Scaler/PCA 在相同数据上的拟合结果落盘复用
+        memory = None
+        if self.chk_cache.isChecked() and steps:
+            memory = joblib.Memory(PIPELINE_CACHE_DIR, verbose=0)
+
         steps.append(("clf", est))
-        pipe = Pipeline(steps)
-        grid = {f"clf__{k}": v for k, v in grid_user.items()} if grid_user else defs
+        pipe = Pipeline(steps, memory=memory)
+        if large_n:
+            # gamma 属于核映射步骤 (Nystroem 只接受数值，scale/auto 等取默认 1/n_features)，其余交给 LinearSVC
+            grid = {}
+            for k, v in grid_user.items():
+                if k == "gamma":
+                    v = [g for g in v if isinstance(g, (int, float))]
+                    if v:
+                        grid["rbf__gamma"] = v
+                else:
+                    grid[f"clf__{k}"] = v
+            grid = grid or defs
+        else:
+            grid = {f"clf__{k}": v for k, v in grid_user.items()} if grid_user else defs
         return pipe, grid
 
+    def _mi_pre_enabled(self):
+        return (self.chk_kbest.isChecked() and self.cmb_kbest_score.currentText() != "f_classif"
+                and self.chk_mi_pre.isChecked())
+
+    def _apply_mi_scores(self, pipe, Xtr, ytr):
+        """
+        (在后台任务中调用) 在训练集上计算一次互信息得分 (测试集不参与，按 Xtr 缓存)，
+        并以 _FixedScores 替换 SelectKBest 的打分函数
+        """
+        c = self._mi_cache
+        if c is not None and c[0] is Xtr:
+            scores = c[1]
+        else:
+            scores = mutual_info_classif(Xtr, ytr, random_state=0)
+            self._mi_cache = (Xtr, scores)
+        pipe.set_params(select__score_func=_FixedScores(scores))
+
+    def _get_cv_folds(self, X, y, cv):
+        """
+        同一份数据与折数只生成一次分层折索引 (list)，
+        各次搜索/学习曲线使用完全相同的折，Pipeline memory 缓存也能命中
+        """
+        key = (id(X), cv)
+        c = self._cv_folds.get(key)
+        if c is not None and c[0] is X:
+            return c[1]
+        folds = list(StratifiedKFold(cv, shuffle=True, random_state=0).split(X, y))
+        # 只保留训练集与全量数据两份，避免旧数据的折索引累积
+        if len(self._cv_folds) >= 2:
+            self._cv_folds.clear()
+        self._cv_folds[key] = (X, folds)
+        return folds
+
+    def _make_search(self, pipe, grid, scoring, folds):
+        """按界面选择构造超参搜索器：网格 (穷举) 或贝叶斯 (按评分引导采样)"""
+        if self.cmb_search.currentIndex() == 1:
+            if BayesSearchCV is None:
+                self._show_msg("提示", "未安装 scikit-optimize，回退到网格搜索", False)
+            elif grid:
+                space = _grid_to_search_space(grid)
+                n_iter = self.spin_iter.value()
+                # 全为类别参数时，迭代次数不超过组合总数
+                if all(isinstance(d, Categorical) for d in space.values()):
+                    n_iter = min(n_iter, int(np.prod([len(v) for v in grid.values()])))
+                self._set_clf_jobs(pipe, 1)
+                return BayesSearchCV(pipe, space, n_iter=n_iter, scoring=scoring, cv=folds,
+                                     n_jobs=-1, random_state=0)
+        # 随机森林仅在 n_estimators 上取多个值时，按折增量加树
+        n_list = grid.get("clf__n_estimators", [])
+        if (isinstance(pipe.steps[-1][1], RandomForestClassifier) and len(n_list) > 1
+                and all(len(v) == 1 for k, v in grid.items() if k != "clf__n_estimators")):
+            self._set_clf_jobs(pipe, -1)
+            return _WarmStartForestSearch(pipe, grid, scoring, folds)
+
+        # HistGBT 自身以 OpenMP 多线程建树，外层搜索保持串行
+        if isinstance(pipe.steps[-1][1], HistGradientBoostingClassifier):
+            return GridSearchCV(pipe, grid, scoring=scoring, cv=folds, n_jobs=1)
+
+        # 并行策略只选一层，避免 (搜索进程数 × 分类器线程数) 超额订阅：
+        # 拟合次数 (网格点 × 折数) 足以占满核心时并行搜索，否则让分类器内部并行
+        n_fits = int(np.prod([len(v) for v in grid.values()])) * len(folds) if grid else len(folds)
+        if n_fits >= (os.cpu_count() or 1):
+            self._set_clf_jobs(pipe, 1)
+            outer_jobs = -1
+        else:
+            self._set_clf_jobs(pipe, -1)
+            outer_jobs = 1
+        return GridSearchCV(pipe, grid, scoring=scoring, cv=folds, n_jobs=outer_jobs)
+
+    @staticmethod
+    def _set_clf_jobs(pipe, n_jobs):
+        """分类器支持 n_jobs (RF / KNN / LR) 时设置其内部并行度"""
+        if "n_jobs" in pipe.steps[-1][1].get_params():
+            pipe.set_params(clf__n_jobs=n_jobs)
+
+    def _get_split(self):
+        """按当前测试集比例划分 (固定 random_state)；同一份 X 与比例只划分一次"""
+        test_size = self.split_spin.value()
+        c = self._split_cache
+        if c is not None and c[0] is self.X and c[1] == test_size:
+            return c[2]
+        split = train_test_split(self.X, self.y, test_size=test_size, stratify=self.y, random_state=0)
+        self._split_cache = (self.X, test_size, split)
+        self._scaled_cache = None
+        return split
+
+    def _get_scaled_split(self):
+        """在训练集上拟合一次 StandardScaler，缓存连续 float32 的 (Xtr_s, Xte_s, ytr, yte)"""
+        Xtr, Xte, ytr, yte = self._get_split()
+        c = self._scaled_cache
+        if c is not None and c[0] is Xtr:
+            return c[1]
+        sc = StandardScaler().fit(Xtr)
+        Xtr_s = np.ascontiguousarray(sc.transform(Xtr), dtype=np.float32)
+        Xte_s = np.ascontiguousarray(sc.transform(Xte), dtype=np.float32)
+        scaled = (Xtr_s, Xte_s, ytr, yte)
+        self._scaled_cache = (Xtr, scaled)
+        return scaled
+
+    # ======================================================
+    # 后台任务
+    # ======================================================
+    def _set_busy(self, busy: bool):
+        for b in (self.btn_train, self.btn_lc, self.btn_cmp):
+            b.setEnabled(not busy)
+
+    def _submit(self, fn, on_done, fail_title):
+        """把耗时计算提交到全局线程池；on_done 在 GUI 线程中执行绘图"""
+        if self._job is not None:
+            self._show_msg("提示", "已有训练任务在运行", False)
+            return
+        job = _FitJob(fn)
+        job.signals.done.connect(self._on_job_finished)
+        job.signals.failed.connect(self._on_job_finished)
+        job.signals.done.connect(on_done)
+        job.signals.failed.connect(self._on_job_failed)
+        self._job = job
+        self._job_fail_title = fail_title
+        self._set_busy(True)
+        QThreadPool.globalInstance().start(job)
+
+    def _on_job_finished(self, _=None):
+        self._job = None
+        self._set_busy(False)
+
+    def _on_job_failed(self, msg):
+        self._show_msg(self._job_fail_title, msg, False)
+
+    # ======================================================
+    # 训练 / 学习曲线 / 批量对比
+    # ======================================================
     def _train(self):
         if self.X is None or self.y is None:
             self._show_msg("提示", "无数据", False)
             return
 
         try:
-            test_size = self.split_spin.value()
-            Xtr, Xte, ytr, yte = train_test_split(self.X, self.y, test_size=test_size, stratify=self.y, random_state=0)
+            Xtr, Xte, ytr, yte = self._get_split()
             self._last_split = (Xtr, Xte, ytr, yte)
 
             pipe, grid = self._build_pipeline()
+            mi_pre = self._mi_pre_enabled()
             cv = self.cv_spin.value()
             scoring = self.cmb_score.currentText()
 
             self._show_msg("开始训练", f"CV={cv}, Grid={grid}", True)
             self._clear_axes()
 
-            gs = GridSearchCV(pipe, grid, scoring=scoring, cv=StratifiedKFold(cv, shuffle=True, random_state=0),
-                              n_jobs=-1)
+            gs = self._make_search(pipe, grid, scoring, self._get_cv_folds(Xtr, ytr, cv))
+        except Exception as e:
+            self._show_msg("训练异常", str(e), False)
+            return
+
+        def fit():
+            # 互信息打分较慢，与拟合一起放在线程池中完成
+            if mi_pre:
+                self._apply_mi_scores(pipe, Xtr, ytr)
             gs.fit(Xtr, ytr)
+            return gs
 
+        self._submit(fit, self._on_train_done, "训练异常")
+
+    def _on_train_done(self, gs):
+        try:
+            Xtr, Xte, ytr, yte = self._last_split
             self.model = gs.best_estimator_
 
             # Eval
@@ -593,27 +1019,32 @@ class MLTrainerPanel(QWidget):
             self.txt_report.setPlainText(f"最优参数: {gs.best_params_}\n最佳CV分数: {gs.best_score_:.4f}\n\n{report}")
 
             # Plot CM
+            # 类别较多时单元格数值难以辨认，只画色块，省去 K² 个文本对象
             self._style_axis(self.canvas.ax_cm, "Confusion Matrix")
-            self.canvas.ax_cm.imshow(cm, cmap="Blues")
-            for i in range(cm.shape[0]):
-                for j in range(cm.shape[1]):
-                    self.canvas.ax_cm.text(j, i, str(cm[i, j]), ha="center", va="center")
+            ConfusionMatrixDisplay(cm).plot(ax=self.canvas.ax_cm, cmap="Blues", colorbar=False,
+                                            include_values=cm.shape[0] <= 12)
 
             # Plot ROC
-            self._style_axis(self.canvas.ax_roc, "ROC Curve")
-            if hasattr(self.model, "predict_proba"):
-                probs = self.model.predict_proba(Xte)
-                if probs.shape[1] == 2:
-                    fpr, tpr, _ = roc_curve(yte, probs[:, 1])
-                    self.canvas.ax_roc.plot(fpr, tpr, label=f"AUC={auc(fpr, tpr):.3f}", color="#FF6B6B")
+            # ROC 只依赖得分排序：优先用 decision_function，无则退回 predict_proba
+            scores = None
+            curves = []
+            if hasattr(self.model, "decision_function"):
+                scores = self.model.decision_function(Xte)
+            elif hasattr(self.model, "predict_proba"):
+                scores = self.model.predict_proba(Xte)
+                if scores.shape[1] == 2:
+                    scores = scores[:, 1]
+            if scores is not None:
+                if scores.ndim == 1:
+                    fpr, tpr, _ = roc_curve(yte, scores)
+                    curves.append((fpr, tpr, f"AUC={auc(fpr, tpr):.3f}"))
                 else:
-                    for i in range(probs.shape[1]):
-                        fpr, tpr, _ = roc_curve((yte == i).astype(int), probs[:, i])
-                        self.canvas.ax_roc.plot(fpr, tpr, label=f"C{i} AUC={auc(fpr, tpr):.2f}")
-                self.canvas.ax_roc.plot([0, 1], [0, 1], 'k--', alpha=0.3)
-                self.canvas.ax_roc.legend(fontsize=8)
+                    for i in range(scores.shape[1]):
+                        fpr, tpr, _ = roc_curve((yte == i).astype(int), scores[:, i])
+                        curves.append((fpr, tpr, f"C{i} AUC={auc(fpr, tpr):.2f}"))
+            self.canvas.set_roc(curves)
 
-            self.canvas.draw()
+            self.canvas.draw_idle()
 
         except Exception as e:
             self._show_msg("训练异常", str(e), False)
@@ -622,17 +1053,34 @@ class MLTrainerPanel(QWidget):
         if self.X is None: return
         try:
             pipe, _ = self._build_pipeline()
+            mi_pre = self._mi_pre_enabled()
+            if mi_pre:
+                Xtr, _, ytr, _ = self._get_split()
             cv = self.cv_spin.value()
-            self._style_axis(self.canvas.ax_lc, "Learning Curve")
+        except Exception as e:
+            self._show_msg("绘图失败", str(e), False)
+            return
+
+        X, y = self.X, self.y
+        folds = self._get_cv_folds(X, y, cv)
+        # 曲线最右端封顶约 5000 个样本：大数据集上后几个点趋于平坦，却占据绝大部分拟合时间
+        hi = min(1.0, 5000 / len(y))
+        sizes = np.linspace(min(0.1, hi), hi, 5)
+        def run():
+            if mi_pre:
+                self._apply_mi_scores(pipe, Xtr, ytr)
+            return learning_curve(pipe, X, y, cv=folds, train_sizes=sizes, n_jobs=-1)
 
-            ts, tr_sc, va_sc = learning_curve(pipe, self.X, self.y, cv=StratifiedKFold(cv), n_jobs=-1)
+        self._submit(run, self._on_learning_curve_done, "绘图失败")
+
+    def _on_learning_curve_done(self, result):
+        try:
+            ts, tr_sc, va_sc = result
             tr_mean = np.mean(tr_sc, axis=1)
             va_mean = np.mean(va_sc, axis=1)
 
-            self.canvas.ax_lc.plot(ts, tr_mean, 'o-', color="#4ECDC4", label="Train")
-            self.canvas.ax_lc.plot(ts, va_mean, 's-', color="#FF6B6B", label="Valid")
-            self.canvas.ax_lc.legend(fontsize=8)
-            self.canvas.draw()
+            self.canvas.set_learning_curve(ts, tr_mean, va_mean)
+            self.canvas.draw_idle()
         except Exception as e:
             self._show_msg("绘图失败", str(e), False)
 
@@ -641,8 +1089,9 @@ class MLTrainerPanel(QWidget):
         path, _ = QFileDialog.getSaveFileName(self, "保存模型", "data/models/model.pkl", "Pickle (*.pkl)")
         if path:
             try:
-                with open(path, "wb") as f:
-                    pickle.dump({"model": self.model, "classes": self.classes_}, f)
+                # joblib 将 ndarray (支持向量 / 树结构) 单独压缩存储，比直接 pickle 更小、加载更快
+                joblib.dump({"model": self.model, "classes": self.classes_}, path,
+                            compress=MODEL_COMPRESS, protocol=pickle.HIGHEST_PROTOCOL)
                 self._show_msg("成功", f"保存至 {path}", True)
             except Exception as e:
                 self._show_msg("失败", str(e), False)
@@ -651,8 +1100,12 @@ class MLTrainerPanel(QWidget):
         path, _ = QFileDialog.getOpenFileName(self, "加载模型", "data/models", "Pickle (*.pkl)")
         if path:
             try:
-                with open(path, "rb") as f:
-                    d = pickle.load(f)
+                try:
+                    d = joblib.load(path)
+                except Exception:
+                    # 兼容旧版直接 pickle.dump 保存的模型
+                    with open(path, "rb") as f:
+                        d = pickle.load(f)
                 self.model = d["model"]
                 self.classes_ = d["classes"]
                 self.txt_report.setPlainText(f"模型已加载: {os.path.basename(path)}")
@@ -662,40 +1115,50 @@ class MLTrainerPanel(QWidget):
     def _run_comparison(self):
         if self.X is None: return
         try:
-            Xtr, Xte, ytr, yte = train_test_split(self.X, self.y, test_size=0.2, stratify=self.y, random_state=0)
-            res = []
+            # 与训练共用同一划分；标准化只在训练集上拟合一次，各候选直接使用缓存结果
+            if self.chk_standardize.isChecked():
+                Xtr, Xte, ytr, yte = self._get_scaled_split()
+            else:
+                Xtr, Xte, ytr, yte = self._get_split()
 
             cands = []
-            if self.chk_cmp_svm_rbf.isChecked(): cands.append(("SVM-RBF", SVC(probability=True)))
-            if self.chk_cmp_svm_lin.isChecked(): cands.append(("SVM-Lin", SVC(kernel='linear', probability=True)))
+            if self.chk_cmp_svm_rbf.isChecked(): cands.append(("SVM-RBF", SVC()))
+            if self.chk_cmp_svm_lin.isChecked(): cands.append(("SVM-Lin", SVC(kernel='linear')))
             if self.chk_cmp_knn.isChecked(): cands.append(("KNN", KNeighborsClassifier()))
             if self.chk_cmp_lr.isChecked(): cands.append(("LR", LogisticRegression()))
             if self.chk_cmp_rf.isChecked(): cands.append(("RF", RandomForestClassifier()))
+            if self.chk_cmp_hgb.isChecked(): cands.append(("HistGBT", HistGradientBoostingClassifier(random_state=0)))
 
             if not cands: return
+        except Exception as e:
+            self._show_msg("对比失败", str(e), False)
+            return
 
+        def fit_all():
+            res = []
+            for name, clf in cands:
+                clf.fit(Xtr, ytr)
+                res.append((name, clf.score(Xte, yte)))
+            return res
+
+        self._submit(fit_all, self._on_comparison_done, "对比失败")
+
+    def _on_comparison_done(self, res):
+        try:
             txt = "批量对比结果:\n"
-            base_steps = []
-            if self.chk_standardize.isChecked(): base_steps.append(("sc", StandardScaler()))
 
             scores = []
             names = []
 
-            for name, clf in cands:
-                p = Pipeline(base_steps + [("clf", clf)])
-                p.fit(Xtr, ytr)
-                s = p.score(Xte, yte)
-                res.append((name, s))
+            for name, s in res:
                 txt += f"{name}: {s:.4f}\n"
                 scores.append(s)
                 names.append(name)
 
             self.txt_report.setPlainText(txt)
 
-            self._style_axis(self.canvas.ax_cmp, "Batch Comparison")
-            self.canvas.ax_cmp.bar(names, scores, color=['#4ECDC4', '#FF6B6B', '#C7F464', '#556270', '#C44D58'])
-            self.canvas.ax_cmp.set_ylim(0, 1.05)
-            self.canvas.draw()
+            self.canvas.set_comparison(names, scores)
+            self.canvas.draw_idle()
 
         except Exception as e:
-            self._show_msg("对比失败", str(e), False)
\ No newline at end of file
+            self._show_msg("对比失败", str(e), False)
@@ -3,10 +3,130 @@
 # 机器学习模型与特征提取库
 # 严禁引入 PyQt5
 
+import weakref
+from collections import OrderedDict
+
 import numpy as np
 import scipy.linalg
 from sklearn.base import BaseEstimator, TransformerMixin
 
+# 可选：numba 加速小批量 (在线推理) 的 CSP 特征提取
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# 复合协方差条件数超过该值时 float32 精度不足，协方差与特征分解回退 float64
+FLOAT32_MAX_COND = 1e4
+
+# 单类数据超过该字节数时按试次分块累加协方差，限制中间结果与峰值内存
+COV_CHUNK_BYTES = 64 << 20
+COV_CHUNK_TRIALS = 32
+
+# 类协方差缓存 (LRU)：同一份训练数据重复 fit (如扫描 n_components) 时只做特征分解
+COV_CACHE_SIZE = 8
+_cov_cache = OrderedDict()
+
+# 试次数 × 采样点数低于该值时，BLAS 调用开销占主导，走 numba 融合内核
+NUMBA_TRANSFORM_MAX = 1 << 16
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _transform_numba(filters, X, out):
+        """
+        空间滤波 + 单遍方差 + 归一化 Log，一次融合循环完成 (仅外层 prange)。
+        以首个采样点为平移量累加矩 (shifted data)，直流偏置较大时也不会相消出负方差
+        """
+        n_trials, n_channels, n_samples = X.shape
+        n_comps = filters.shape[0]
+        for i in prange(n_trials):
+            total = 0.0
+            for k in range(n_comps):
+                shift = 0.0
+                for c in range(n_channels):
+                    shift += filters[k, c] * X[i, c, 0]
+                s1 = 0.0
+                s2 = 0.0
+                for t in range(n_samples):
+                    z = 0.0
+                    for c in range(n_channels):
+                        z += filters[k, c] * X[i, c, t]
+                    z -= shift
+                    s1 += z
+                    s2 += z * z
+                mean = s1 / n_samples
+                v = s2 / n_samples - mean * mean
+                out[i, k] = v
+                total += v
+            for k in range(n_comps):
+                out[i, k] = np.log(out[i, k] / total)
+else:
+    _transform_numba = None
+
+
+def _extreme_eigvecs(a, b, m):
+    """
+    对称 (广义) 特征问题 a v = λ b v 只求两端特征向量。
+
+    Returns:
+        (top, bot): 各 (n, m)，列按特征值降序；top 为最大的 m 个，bot 为最小的 m 个
+    """
+    n = a.shape[0]
+    # 区间选择需 RRR / 二分驱动 (evr / gvx)，分治驱动 (evd / gvd) 不支持
+    driver = 'evr' if b is None else 'gvx'
+    _, top = scipy.linalg.eigh(a, b, subset_by_index=[n - m, n - 1], driver=driver)
+    _, bot = scipy.linalg.eigh(a, b, subset_by_index=[0, m - 1], driver=driver)
+    return top[:, ::-1], bot[:, ::-1]
+
+
+def csp_filters_batch(cov0, cov_combined, m):
+    """
+    批量求解多组 CSP 问题 (如 频带 × 交叉验证折)：所有协方差对堆叠后，
+    白化与特征分解各只调用一次 np.linalg.eigh (LAPACK 循环在 C 层完成)。
+
+    Args:
+        cov0: 第一类平均协方差, 形状 (B, C, C)
+        cov_combined: 两类协方差之和, 形状 (B, C, C)
+        m: 每端保留的滤波器个数
+
+    Returns:
+        filters: 形状 (B, 2m, C)，每组排列与 CSP.filters_ 一致 (最大 m 个降序 + 最小 m 个降序)
+    """
+    # 批量白化: P = cov_combined^(-1/2)
+    s, U = np.linalg.eigh(cov_combined)
+    P = (U * s[:, None, :] ** -0.5) @ U.transpose(0, 2, 1)
+    _, V = np.linalg.eigh(P @ cov0 @ P.transpose(0, 2, 1))
+
+    # 升序特征值：末尾 m 个 (降序) 与开头 m 个 (降序)
+    V = np.concatenate([V[:, :, -m:][:, :, ::-1], V[:, :, :m][:, :, ::-1]], axis=2)
+    # (P.T @ V).T = V.T @ P
+    return V.transpose(0, 2, 1) @ P
+
+
+def _weighted_cov_sum(block, n_total, center):
+    """
+    一块试次 (..., n, C, S) 对类平均协方差的贡献: Σ (X * X.T) / (trace * n_total)。
+    trace 归一化与求平均合并为一次加权求和，不回写 (n, C, C) 块。
+    """
+    if center:
+        # 切片是调用方数据的视图，去均值不能原地进行
+        block = block - block.mean(axis=-1, keepdims=True)
+    C = np.matmul(block, np.swapaxes(block, -1, -2))
+    w = (1.0 / (np.einsum('...cc->...', C) * n_total)).astype(C.dtype)
+    return np.einsum('...ncd,...n->...cd', C, w)
+
+
+def _log_var_features(Z):
+    """
+    归一化 Log 方差特征。Z 形状 (..., n_components, n_samples)，沿最后一轴求方差。
+    先去均值再求平方和：原始数据可能带较大直流偏置，E[Z²] - E[Z]² 会严重相消甚至为负；
+    特征以 float64 输出，与下游分类器训练时一致。
+    """
+    Zc = Z - Z.mean(axis=-1, keepdims=True)
+    var = np.einsum('...s,...s->...', Zc, Zc) / Z.shape[-1]
+    var = var.astype(np.float64, copy=False)
+    return np.log(var / var.sum(axis=-1, keepdims=True))
+
 
 class CSP(BaseEstimator, TransformerMixin):
     """
@@ -19,19 +139,30 @@ class CSP(BaseEstimator, TransformerMixin):
         filters_ (m_filters * 2, n_channels): 空间滤波器矩阵
     """
 
-    def __init__(self, n_components=4, backend='vectorized'):
+    def __init__(self, n_components=4, backend='vectorized', center=True, dtype=np.float64):
         """
         Args:
             n_components: 保留的特征分量总数 (通常为偶数，如 4 表示取首2和尾2)
             backend: 'vectorized' 或 'loop'
+            center: 计算协方差前是否逐试次去均值 (vectorized)。
+                    采集与训练路径送入的是未去直流的原始试次，默认开启；
+                    确认输入已带通滤波/去趋势时可设为 False 省去一遍读写
+            dtype: 计算精度。默认 float64；np.float32 可减半带宽与缓存占用
+                   (协方差近奇异时自动回退 float64)，但直流偏置大的原始数据精度会下降
         """
         self.n_components = n_components
         self.backend = backend
+        self.center = center
+        self.dtype = dtype
         self.filters_ = None
         # 兼容 sklearn 习惯
         self.patterns_ = None
         self.mean_ = None
         self.std_ = None
+        # 白化矩阵缓存: (cov_combined, P)，同一复合协方差重复 fit 时跳过分解
+        self._whiten_cache = None
+        # 滤波器组 CSP (fit_bank): (n_bands, 2m, n_channels)
+        self.filters_bank_ = None
 
     def fit(self, X, y):
         """
@@ -49,11 +180,12 @@ class CSP(BaseEstimator, TransformerMixin):
         if len(classes) != 2:
             raise ValueError("CSP requires exactly 2 classes.")
 
-        # 路由到具体实现
+        # 路由到具体实现 (计算精度由 dtype 决定)
         if self.backend == 'loop':
-            self._fit_loop(X, y, classes)
+            self._fit_loop(np.asarray(X, dtype=self.dtype), y, classes)
         else:
             self._fit_vectorized(X, y, classes)
+        self.filters_ = self.filters_.astype(self.dtype, copy=False)
 
         return self
 
@@ -76,66 +208,143 @@ class CSP(BaseEstimator, TransformerMixin):
         if X.ndim == 2:
             X = X[np.newaxis, :, :]
             input_is_2d = True
+        X = np.asarray(X, dtype=self.dtype)
 
-        n_trials = X.shape[0]
-        feats = np.zeros((n_trials, self.n_components))
+        if _transform_numba is not None and X.shape[0] * X.shape[2] < NUMBA_TRANSFORM_MAX:
+            out = np.empty((X.shape[0], self.filters_.shape[0]))
+            _transform_numba(self.filters_, X, out)
+            return out
 
         # 投影: Z = W.T * X  (这里 W=filters_.T)
         # filters_ shape: (n_comps, n_channels)
-        # X[i] shape: (n_channels, n_samples)
+        # X shape: (n_trials, n_channels, n_samples)
+        # 所有试次一次性批量空间滤波 -> (n_trials, n_components, n_samples)
+        Z = np.matmul(self.filters_, X)
+        return _log_var_features(Z)
 
-        for i in range(n_trials):
-            # 空间滤波 -> (n_components, n_samples)
-            Z = np.dot(self.filters_, X[i])
-            # 计算方差 -> (n_components,)
-            var = np.var(Z, axis=1)
-            # Log 变换并归一化
-            feats[i] = np.log(var / np.sum(var))
+    def fit_bank(self, Xs, y):
+        """
+        滤波器组 CSP：各频带独立求解，但协方差与特征分解按频带批量一次完成。
 
-        return feats
+        Args:
+            Xs: 各频带滤波后的数据, 形状 (n_bands, n_trials, n_channels, n_samples)
+            y: 标签, 形状 (n_trials,)
+        """
+        if Xs.ndim != 4:
+            raise ValueError("CSP fit_bank expects 4D input: (n_bands, n_trials, n_channels, n_samples)")
+        classes = np.unique(y)
+        if len(classes) != 2:
+            raise ValueError("CSP requires exactly 2 classes.")
+
+        Xs = np.asarray(Xs, dtype=self.dtype)
+        cov0, cov1 = self._class_covariances(Xs, y, classes, self.center)
+        cov_combined = cov0 + cov1
+        if Xs.dtype == np.float32 and np.any(np.linalg.cond(cov_combined) > FLOAT32_MAX_COND):
+            cov0, cov1 = self._class_covariances(Xs.astype(np.float64), y, classes, self.center)
+            cov_combined = cov0 + cov1
+
+        self.filters_bank_ = csp_filters_batch(cov0, cov_combined, self.n_components // 2).astype(
+            self.dtype, copy=False)
+        return self
+
+    def transform_bank(self, Xs):
+        """
+        提取滤波器组特征。
+
+        Args:
+            Xs: 形状 (n_bands, n_trials, n_channels, n_samples)
+
+        Returns:
+            features: 形状 (n_trials, n_bands * n_components)，按频带顺序拼接
+        """
+        if self.filters_bank_ is None:
+            raise RuntimeError("CSP filter bank not fitted yet!")
+        Xs = np.asarray(Xs, dtype=self.dtype)
+        # (n_bands, 1, 2m, C) @ (n_bands, n_trials, C, S) -> (n_bands, n_trials, 2m, S)
+        feats = _log_var_features(np.matmul(self.filters_bank_[:, None], Xs))
+        return feats.transpose(1, 0, 2).reshape(Xs.shape[1], -1)
 
     def _fit_vectorized(self, X, y, classes):
         """基于矩阵运算的高效实现"""
-        n_channels = X.shape[1]
-
-        # 计算两类的平均协方差矩阵
-        covs = []
-        for cls in classes:
-            X_cls = X[y == cls]
-            # 计算该类所有试次的协方差并平均
-            # cov(X) = (X * X.T) / trace
-            C_sum = np.zeros((n_channels, n_channels))
-            for i in range(len(X_cls)):
-                trial = X_cls[i]
-                # 均值移除 (虽通常预处理做过，但为了保险)
-                trial = trial - trial.mean(axis=1, keepdims=True)
-                c = np.dot(trial, trial.T)
-                c /= np.trace(c)  # 归一化 trace
-                C_sum += c
-            covs.append(C_sum / len(X_cls))
-
-        cov0, cov1 = covs[0], covs[1]
+        cov0, cov1 = self._estimate_covs(X, y, classes)
         cov_combined = cov0 + cov1
 
         # 广义特征值分解: cov0 * w = lambda * (cov0 + cov1) * w
-        # 这里的实现等价于求解 P * cov0 * P.T 的特征值，其中 P 是白化矩阵
-        # 为了简单，直接用 scipy.linalg.eigh 求解广义特征值问题
-        # Ax = lambda Bx
-        eigvals, eigvecs = scipy.linalg.eigh(cov0, cov_combined)
-
-        # eigh 返回的是升序，我们需要降序 (最大特征值对应第一类，最小特征值对应第二类)
-        # 同时要取两端
-        # sorted indices descending
-        ix = np.argsort(np.abs(eigvals))[::-1]
-        eigvecs = eigvecs[:, ix]
-
-        # 取滤波器: 前 m 个和 后 m 个
+        # 经典白化形式：P = cov_combined^(-1/2)，对 P * cov0 * P.T 做标准对称特征分解，
+        # 特征向量 P.T * V 与广义解一致 (满足 w.T * cov_combined * w = 1)
+        P = self._whitening(cov_combined)
+
+        # 取滤波器: 最大的 m 个和最小的 m 个特征值 (最大特征值对应第一类，最小特征值对应第二类)
+        # 只求两端所需的特征向量，其余 C-2m 个不计算
         m = self.n_components // 2
-        filters_top = eigvecs[:, :m]
-        filters_bot = eigvecs[:, -m:]
+        V_top, V_bot = _extreme_eigvecs(P @ cov0 @ P.T, None, m)
+
+        # 直接写入预分配的 (n_components, n_channels) C 连续缓冲区: (P.T @ V).T = V.T @ P
+        filters = np.empty((2 * m, P.shape[0]), dtype=P.dtype)
+        np.matmul(V_top.T, P, out=filters[:m])
+        np.matmul(V_bot.T, P, out=filters[m:])
+        self.filters_ = filters
+
+    def _estimate_covs(self, X, y, classes):
+        """
+        两类平均协方差 (精度为 self.dtype)；float32 下近奇异时以 float64 重新计算。
+        结果按输入数组对象缓存：同一 X (仍存活的同一对象) 与相同标签再次 fit 时直接复用。
+        注意：原地修改 X 后再 fit 需传入新数组。
+        """
+        y = np.asarray(y)
+        key = (id(X), X.shape, X.dtype.str, y.tobytes(), self.center, np.dtype(self.dtype).str)
+        hit = _cov_cache.get(key)
+        if hit is not None and hit[0]() is X:
+            _cov_cache.move_to_end(key)
+            return hit[1]
+
+        Xf = np.asarray(X, dtype=self.dtype)
+        covs = self._class_covariances(Xf, y, classes, self.center)
+        if Xf.dtype == np.float32 and np.linalg.cond(covs[0] + covs[1]) > FLOAT32_MAX_COND:
+            covs = self._class_covariances(Xf.astype(np.float64), y, classes, self.center)
+
+        _cov_cache[key] = (weakref.ref(X), covs)
+        if len(_cov_cache) > COV_CACHE_SIZE:
+            _cov_cache.popitem(last=False)
+        return covs
+
+    @staticmethod
+    def _class_covariances(X, y, classes, center):
+        """
+        两类各自的 trace 归一化平均协方差，精度与 X 的 dtype 一致。
+        X 形状为 (..., n_trials, n_channels, n_samples)，前导维度 (如频带) 原样保留。
+        """
+        # 试次按标签排好序后每一类都是连续切片 (视图)，无需逐类布尔掩码拷贝；
+        # 常见的 "先左后右" 拼接本身已有序，此时完全零拷贝，否则整体重排一次
+        y = np.asarray(y)
+        if np.any(y[:-1] > y[1:]):
+            order = np.argsort(y, kind='stable')
+            X = np.take(X, order, axis=-3)
+            y = y[order]
+        starts = np.searchsorted(y, classes, side='left')
+        ends = np.searchsorted(y, classes, side='right')
 
-        # 组合并转置，使得 filters_ 的形状为 (n_components, n_channels)
-        self.filters_ = np.concatenate([filters_top, filters_bot], axis=1).T
+        covs = []
+        for start, end in zip(starts, ends):
+            X_cls = X[..., start:end, :, :]
+            n = end - start
+            # 数据量不大时整类一次计算；超大训练集按块流式累加，每个试次仍只读一遍
+            step = n if X_cls.nbytes <= COV_CHUNK_BYTES else COV_CHUNK_TRIALS
+            cov = _weighted_cov_sum(X_cls[..., :step, :, :], n, center)
+            for i in range(step, n, step):
+                cov += _weighted_cov_sum(X_cls[..., i:i + step, :, :], n, center)
+            covs.append(cov)
+        return covs
+
+    def _whitening(self, cov_combined):
+        """cov_combined^(-1/2)；复合协方差与上次相同 (如多次重复 fit) 时直接复用"""
+        c = self._whiten_cache
+        if c is not None and np.array_equal(c[0], cov_combined):
+            return c[1]
+        s, U = scipy.linalg.eigh(cov_combined, driver='evd')
+        P = (U * s ** -0.5) @ U.T
+        self._whiten_cache = (cov_combined, P)
+        return P
 
     def _fit_loop(self, X, y, classes):
         """
@@ -163,7 +372,7 @@ class CSP(BaseEstimator, TransformerMixin):
 
         cov_combined = cov_x[0] + cov_x[1]
 
-        # 3. 特征分解 (scipy.linalg.eig)
+        # 3. 特征分解 (scipy.linalg.eigh)
         # 原代码：scipy.linalg.eig(cov_combined, cov_x[0]) 这里的物理意义有点反直觉
         # 通常是 eig(cov_0, cov_combined) 或者 先白化 cov_combined
         # 但为了保持和 CSP_2.py 逻辑一致，我们尽量还原它的数学过程
@@ -171,23 +380,20 @@ class CSP(BaseEstimator, TransformerMixin):
 
         # 修正：为了保证效果，这里建议还是使用标准的广义特征分解
         # 如果必须严格复刻 CSP_2.py 的特殊写法：
-        vals, vecs = scipy.linalg.eig(cov_combined, cov_x[0])
-
-        # 排序
-        sort_indices = np.argsort(np.abs(vals))[::-1]
-        vecs = vecs[:, sort_indices]
-
-        # CSP_2.py 取的是 transpose
-        u_mat = np.transpose(vecs)
+        # 两矩阵均为对称正定，用对称广义求解器 eigh 代替通用 eig：
+        # 特征值为实数且非负，无需对复数取模
 
         # 选择特征向量 (首 m 个 和 尾 m 个)
         # CSP_2.py 的 transform 逻辑略显复杂，这里我们将其统一到标准的 filters 格式
-        # 原 transform 逻辑是：取 u_mat 前 m 行 和 后 m 行
+        # 原 transform 逻辑是：按特征值降序后取 u_mat (特征向量转置) 前 m 行 和 后 m 行
         m = self.n_components // 2
+        vecs_top, vecs_bot = _extreme_eigvecs(cov_combined, cov_x[0], m)
 
         # 注意：因为上面 eig 的参数顺序问题，这里的特征值含义可能与标准相反
         # 但 CSP 本质是寻找差异最大化，只要取两头即可
-        f1 = u_mat[:m, :]
-        f2 = u_mat[-m:, :]
-
-        self.filters_ = np.concatenate([f1, f2], axis=0)
\ No newline at end of file
+        filters = np.empty((2 * m, n_channels), dtype=vecs_top.dtype)
+        filters[:m] = vecs_top.T
+        filters[m:] = vecs_bot.T
+        # eigh 返回按 cov_x[0] 归一化的特征向量；原 eig 返回单位范数向量，这里按行归一化以保持滤波器尺度不变
+        filters /= np.linalg.norm(filters, axis=1, keepdims=True)
+        self.filters_ = filters
\ No newline at end of file
@@ -14,11 +14,11 @@ subject_manager.py
   - onset_time: 发病时间（可自由输入）
 """
 import sqlite3
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QFormLayout,
+    QTableView, QHeaderView, QDialog, QFormLayout,
     QLineEdit, QSpinBox, QComboBox
 )
 
@@ -82,12 +82,70 @@ class SubjectFormDialog(QDialog):
             'onset_time': self.edit_onset.text().strip(),
         }
 
+# 只读单元格标志 (视图每次绘制都会逐格查询，只构造一次)
+_READONLY_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class SubjectTableModel(QAbstractTableModel):
+    """只读受试者表模型，直接持有数据库查询得到的元组列表"""
+    HEADERS = ["ID", "姓名/代号", "年龄", "性别", "联系方式", "惯用手", "发病时间"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def set_rows(self, rows):
+        """整体替换数据，视图只做一次重置"""
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def subject_id(self, row):
+        return self._rows[row][0]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            value = self._rows[index.row()][index.column()]
+            return str(value) if value is not None else ""
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        # 禁止直接编辑
+        return _READONLY_FLAGS
+
+
 class SubjectManager(QWidget):
     """受试者管理面板，实现受试者列表展示和增删改功能"""
+
+    # SQL 文本固定不变，sqlite3 按文本缓存预编译语句，重复执行不再重新解析
+    _stmt_insert = ("INSERT INTO subjects (name, age, gender, contact, dominant_hand, onset_time) "
+                    "VALUES (?,?,?,?,?,?)")
+    _stmt_update = ("UPDATE subjects SET name=?, age=?, gender=?, contact=?, dominant_hand=?, onset_time=? "
+                    "WHERE id=?")
+    _stmt_delete = "DELETE FROM subjects WHERE id=?"
+    _stmt_select_all = "SELECT id, name, age, gender, contact, dominant_hand, onset_time FROM subjects ORDER BY id"
+    _stmt_select_one = "SELECT name, age, gender, contact, dominant_hand, onset_time FROM subjects WHERE id=?"
+
     def __init__(self, db_path="data.db", parent=None):
         super().__init__(parent)
         self.db_path = db_path
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL 日志：提交只追加日志，不再每次重写回滚日志；NORMAL 同步在 WAL 下仍保证一致性
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self._cur = self.conn.cursor()
         self._create_table()
         self.setWindowTitle("受试者管理")
         self.setFont(QFont("Microsoft YaHei", 10, QFont.Bold))
@@ -95,8 +153,7 @@ class SubjectManager(QWidget):
         self.load_subjects()
 
     def _create_table(self):
-        c = self.conn.cursor()
-        c.execute("""
+        self._cur.execute("""
             CREATE TABLE IF NOT EXISTS subjects (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT,
@@ -113,10 +170,10 @@ class SubjectManager(QWidget):
         # 主布局
         main_layout = QVBoxLayout()
         # 表格
-        self.table = QTableWidget(0, 7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "姓名/代号", "年龄", "性别", "联系方式", "惯用手", "发病时间"
-        ])
+        # 模型/视图：刷新时只重置模型，不再逐格创建 QTableWidgetItem
+        self._model = SubjectTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self._model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setAlternatingRowColors(True)
         # 按钮
@@ -145,21 +202,20 @@ class SubjectManager(QWidget):
             QPushButton:hover { background:#1A84FF; }
             QPushButton:pressed { background:#0062CC; }
             QPushButton:disabled { background:#E0E0E0; color:#9E9E9E; }
-            QTableWidget { border:1px solid #E6E6E6; border-radius:8px; }
+            QTableView { border:1px solid #E6E6E6; border-radius:8px; }
         """)
 
     # --- 数据加载与刷新 ---
     def load_subjects(self):
         """从数据库加载所有受试者到表格"""
-        c = self.conn.cursor()
-        c.execute("SELECT id, name, age, gender, contact, dominant_hand, onset_time FROM subjects ORDER BY id")
-        rows = c.fetchall()
-        self.table.setRowCount(len(rows))
-        for row_idx, row_data in enumerate(rows):
-            for col_idx, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value) if value is not None else "")
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)  # 禁止直接编辑
-                self.table.setItem(row_idx, col_idx, item)
+        self._model.set_rows(self._cur.execute(self._stmt_select_all).fetchall())
+
+    def _current_subject_id(self):
+        """当前选中行对应的受试者 ID，无选中时返回 None"""
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        return int(self._model.subject_id(index.row()))
 
     # --- 操作函数 ---
     def add_subject(self):
@@ -167,9 +223,8 @@ class SubjectManager(QWidget):
         if dlg.exec_() == QDialog.Accepted:
             data = dlg.get_data()
             # 插入数据库
-            c = self.conn.cursor()
-            c.execute(
-                "INSERT INTO subjects (name, age, gender, contact, dominant_hand, onset_time) VALUES (?,?,?,?,?,?)",
+            self._cur.execute(
+                self._stmt_insert,
                 (data['name'], data['age'], data['gender'], data['contact'], data['dominant_hand'], data['onset_time'])
             )
             self.conn.commit()
@@ -177,14 +232,11 @@ class SubjectManager(QWidget):
 
     def edit_subject(self):
         # 获取当前选中的行
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        subject_id = self._current_subject_id()
+        if subject_id is None:
             return
-        subject_id = int(self.table.item(current_row, 0).text())
         # 读取该受试者数据
-        c = self.conn.cursor()
-        c.execute("SELECT name, age, gender, contact, dominant_hand, onset_time FROM subjects WHERE id=?", (subject_id,))
-        row = c.fetchone()
+        row = self._cur.execute(self._stmt_select_one, (subject_id,)).fetchone()
         if not row:
             return
         subj = {
@@ -199,19 +251,17 @@ class SubjectManager(QWidget):
         dlg = SubjectFormDialog(self, subject=subj)
         if dlg.exec_() == QDialog.Accepted:
             data = dlg.get_data()
-            c.execute(
-                "UPDATE subjects SET name=?, age=?, gender=?, contact=?, dominant_hand=?, onset_time=? WHERE id=?",
+            self._cur.execute(
+                self._stmt_update,
                 (data['name'], data['age'], data['gender'], data['contact'], data['dominant_hand'], data['onset_time'], subject_id)
             )
             self.conn.commit()
             self.load_subjects()
 
     def delete_subject(self):
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        subject_id = self._current_subject_id()
+        if subject_id is None:
             return
-        subject_id = int(self.table.item(current_row, 0).text())
-        c = self.conn.cursor()
-        c.execute("DELETE FROM subjects WHERE id=?", (subject_id,))
+        self._cur.execute(self._stmt_delete, (subject_id,))
         self.conn.commit()
         self.load_subjects()
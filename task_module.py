@@ -5,13 +5,21 @@
 # 修复: 使用 InfoLevel.WARNING 替代 ATTENTION 以保证最大兼容性
 
 import os
+import sys
 import csv
+import time
+import shutil
+import ctypes
+from contextlib import contextmanager
 from datetime import datetime
-
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSettings, QUrl
-from PyQt5.QtGui import QFont, QMovie, QDesktopServices
+from functools import partial
+from PyQt5.QtCore import (
+    Qt, QTimer, QElapsedTimer, pyqtSignal, QSettings, QUrl,
+    QObject, QRunnable, QThreadPool
+)
+from PyQt5.QtGui import QFont, QMovie, QDesktopServices, QGuiApplication, QColor, QPainter
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QStackedLayout, QFileDialog, QFrame
+    QWidget, QVBoxLayout, QHBoxLayout, QFileDialog, QFrame, QOpenGLWidget
 )
 
 # Fluent Widgets
@@ -24,11 +32,145 @@ from qfluentwidgets import (
     SmoothScrollArea, VBoxLayout
 )
 
+# 可选：LSL 事件标记流 (与 EEG 采集软件在同一时钟下对齐)
+try:
+    from pylsl import StreamInfo, StreamOutlet, local_clock
+except ImportError:
+    StreamOutlet = None
+
+# 试次记录逐行追加写入会话 CSV (崩溃时已完成的试次不丢失)，内存中只保留当前试次
+TRIAL_LOG_DIR = "data/trials"
+_RECORD_HEADER = ["时间", "意图", "预测", "成功", "Fix", "Cue", "Imag", "Rest", "发送", "反馈"]
+
 # 默认资源路径
 LEFT_GIF_DEFAULT = "assets/left_hand_grasp.gif"
 RIGHT_GIF_DEFAULT = "assets/right_hand_grasp.gif"
 
 
+def _raise_priority():
+    """
+    范式运行期间提高进程优先级，减少系统调度抢占导致的计时抖动。
+    Windows: HIGH_PRIORITY_CLASS + timeBeginPeriod(1) 提高系统定时器精度；
+    POSIX: nice -10 (需要相应权限)。
+    返回恢复所需的原始状态，权限不足等失败时静默跳过。
+    """
+    state = {}
+    if sys.platform == "win32":
+        try:
+            k32 = ctypes.windll.kernel32
+            proc = k32.GetCurrentProcess()
+            old = k32.GetPriorityClass(proc)
+            if old and k32.SetPriorityClass(proc, 0x00000080):  # HIGH_PRIORITY_CLASS
+                state["win_class"] = old
+        except Exception:
+            pass
+        try:
+            if ctypes.windll.winmm.timeBeginPeriod(1) == 0:
+                state["win_period"] = True
+        except Exception:
+            pass
+    else:
+        try:
+            old = os.getpriority(os.PRIO_PROCESS, 0)
+            os.setpriority(os.PRIO_PROCESS, 0, old - 10)
+            state["nice"] = old
+        except Exception:
+            pass
+    return state
+
+
+def _restore_priority(state):
+    """按 _raise_priority 返回的状态恢复进程优先级与定时器精度"""
+    if "win_class" in state:
+        try:
+            k32 = ctypes.windll.kernel32
+            k32.SetPriorityClass(k32.GetCurrentProcess(), state["win_class"])
+        except Exception:
+            pass
+    if state.get("win_period"):
+        try:
+            ctypes.windll.winmm.timeEndPeriod(1)
+        except Exception:
+            pass
+    if "nice" in state:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, state["nice"])
+        except Exception:
+            pass
+
+
+class _ExportSignals(QObject):
+    done = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+
+class _TrialCsvWriter:
+    """会话记录 CSV 的追加写入端；只在单线程 I/O 池中调用，按提交顺序写入"""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self._w = None
+
+    def append(self, row):
+        if self._f is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._f = open(self.path, "a", newline="", encoding="utf-8-sig")
+            self._w = csv.writer(self._f)
+            if self._f.tell() == 0:
+                self._w.writerow(_RECORD_HEADER)
+        # 反馈文本可能含逗号，交给 csv 模块负责引号转义
+        self._w.writerow(row)
+        self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._w = None
+
+
+class _CsvAppendTask(QRunnable):
+    """在 I/O 线程中追加一行试次记录，文件写入不占用界面线程与范式计时"""
+
+    def __init__(self, writer, row, signals):
+        super().__init__()
+        self.writer = writer
+        self.row = row
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.writer.append(self.row)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class _CsvExportTask(QRunnable):
+    """在线程池中复制会话记录 CSV，避免文件 I/O 阻塞界面与范式计时"""
+
+    def __init__(self, src, path):
+        super().__init__()
+        self.src = src
+        self.path = path
+        self.signals = _ExportSignals()
+
+    def run(self):
+        try:
+            shutil.copyfile(self.src, self.path)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.done.emit(self.path)
+
+
+# 各阶段高亮色，导入时探测一次 (不同版本 qfluentwidgets 的枚举名不同)
+# 0: Fix, 1: Cue 保持默认；2: Imag -> 警告色 (橙色)；3: Rest -> 成功色 (绿色)
+_WARN = getattr(InfoLevel, "WARNING", None)
+_SUCC = getattr(InfoLevel, "SUCCESS", None)
+_LVL = (None, None, _WARN, _SUCC)
+
+
 class FluentStageBar(QWidget):
     """使用 InfoBadge 显示的阶段指示条"""
 
@@ -39,6 +181,9 @@ class FluentStageBar(QWidget):
         layout.setSpacing(12)
 
         self.badges = []
+        # 每个 Badge 创建时的级别，用于取消高亮时恢复 (不依赖 NORMAL/INFO 等枚举名)
+        self._default_levels = []
+        self._cur_hl = -1
         stages = ["注视点", "方向提示", "运动想象", "休息"]
 
         for name in stages:
@@ -47,32 +192,103 @@ class FluentStageBar(QWidget):
             badge = InfoBadge.info(name)
             layout.addWidget(badge)
             self.badges.append(badge)
+            self._default_levels.append(getattr(badge, "level", None))
 
         layout.addStretch(1)
 
     def highlight(self, idx: int):
-        # 0: Fix, 1: Cue, 2: Imag, 3: Rest
-        for i, badge in enumerate(self.badges):
-            if i == idx:
-                # 仅在特殊阶段设置特殊颜色
-                if i == 2:  # 想象阶段 -> 警告色 (橙色)
-                    try:
-                        # 尝试使用 WARNING (最通用)
-                        badge.setLevel(InfoLevel.WARNING)
-                    except AttributeError:
-                        pass
-                elif i == 3:  # 休息 -> 成功色 (绿色)
-                    try:
-                        badge.setLevel(InfoLevel.SUCCESS)
-                    except AttributeError:
-                        pass
-                else:
-                    # 其他阶段保持默认，不调用 setLevel 以避免 'NORMAL'/'INFO' 报错
-                    pass
-            else:
-                # 非高亮阶段不强制重置，避免触发崩溃
-                # 下次重绘或状态切换时，InfoBadge 通常会保持最后状态或由样式表控制
-                pass
+        # 只改动状态发生变化的 Badge，每次 setLevel 都会触发样式表重新计算
+        if idx == self._cur_hl:
+            return
+        prev = self._cur_hl
+        if 0 <= prev < 4 and _LVL[prev] is not None:
+            lvl = self._default_levels[prev]
+            if lvl is not None:
+                self.badges[prev].setLevel(lvl)
+        if 0 <= idx < 4:
+            lvl = _LVL[idx]
+            if lvl is not None:
+                self.badges[idx].setLevel(lvl)
+        self._cur_hl = idx
+
+
+class _StimCanvas(QOpenGLWidget):
+    """
+    刺激画布：单个 GL 表面直接绘制当前刺激 (注视点/箭头/GIF 帧/文字)，
+    不经过控件切换与样式表；frameSwapped 时记录刺激实际上屏的时刻。
+    """
+    presented = pyqtSignal(float)
+
+    # 各状态的字体与颜色 (对应原 QLabel 样式表)
+    _FIX = ("+", 80, QColor("#000000"))
+    _CUE_LEFT = ("←", 100, QColor("#007AFF"))
+    _CUE_RIGHT = ("→", 100, QColor("#FF4D4F"))
+    _REST_COLOR = QColor("#666666")
+    _BG = QColor("#FFFFFF")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._kind = "rest"
+        self._text = "休息"
+        self._movie = None
+        self._onset_pending = False
+        self.last_onset_t = None
+        self._fonts = {}
+        self.frameSwapped.connect(self._on_swapped)
+
+    def set_state(self, kind, payload=None):
+        """kind: fix / cue_left / cue_right / gif (payload=QMovie) / rest (payload=文字)"""
+        self._kind = kind
+        if kind == "gif":
+            self._movie = payload
+        elif kind == "rest":
+            self._text = payload
+        self._onset_pending = True
+        self.update()
+
+    def on_movie_frame(self, movie):
+        if self._kind == "gif" and movie is self._movie:
+            self.update()
+
+    def _font(self, px, bold):
+        key = (px, bold)
+        f = self._fonts.get(key)
+        if f is None:
+            f = QFont()
+            f.setPixelSize(px)
+            f.setBold(bold)
+            self._fonts[key] = f
+        return f
+
+    def paintGL(self):
+        p = QPainter(self)
+        rect = self.rect()
+        p.fillRect(rect, self._BG)
+        kind = self._kind
+        if kind == "gif":
+            if self._movie is not None:
+                p.setRenderHint(QPainter.SmoothPixmapTransform)
+                p.drawPixmap(rect, self._movie.currentPixmap())
+        elif kind == "rest":
+            p.setRenderHint(QPainter.TextAntialiasing)
+            p.setFont(self._font(32, False))
+            p.setPen(self._REST_COLOR)
+            p.drawText(rect, Qt.AlignCenter, self._text)
+        else:
+            glyph, px, color = (self._FIX if kind == "fix"
+                                else self._CUE_LEFT if kind == "cue_left" else self._CUE_RIGHT)
+            p.setRenderHint(QPainter.TextAntialiasing)
+            p.setFont(self._font(px, True))
+            p.setPen(color)
+            p.drawText(rect, Qt.AlignCenter, glyph)
+        p.end()
+
+    def _on_swapped(self):
+        # 只记录状态切换后的第一次交换，GIF 后续帧不算作刺激起始
+        if self._onset_pending:
+            self._onset_pending = False
+            self.last_onset_t = time.perf_counter()
+            self.presented.emit(self.last_onset_t)
 
 
 class StimulusArea(ElevatedCardWidget):
@@ -85,65 +301,70 @@ class StimulusArea(ElevatedCardWidget):
         self.setStyleSheet("ElevatedCardWidget { background-color: #FFFFFF; border: 1px solid #E5E5E5; }")
 
         layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
+        # 留出圆角与边框，GL 表面不透明
+        layout.setContentsMargins(4, 4, 4, 4)
 
-        # 内部堆栈布局
-        self.container = QWidget()
-        self.stack = QStackedLayout(self.container)
+        self.canvas = _StimCanvas()
+        # 刺激实际上屏时刻 (time.perf_counter())，可与 stage 信号时间戳比对呈现延迟
+        self.presented = self.canvas.presented
 
-        # 1. 注视点 (+)
-        self.fix = QLabel("+")
-        self.fix.setAlignment(Qt.AlignCenter)
-        self.fix.setStyleSheet("font-size: 80px; color: #000000; font-weight: bold;")
+        # 每个 GIF 路径一个预解析的 QMovie，想象阶段开始时只需 start()
+        self._movies = {}
+        self.movie = None
 
-        # 2. 提示 (←/→)
-        self.cue = QLabel("←")
-        self.cue.setAlignment(Qt.AlignCenter)
-        self.cue.setStyleSheet("font-size: 100px; color: #007AFF; font-weight: bold;")
+        layout.addWidget(self.canvas)
 
-        # 3. GIF
-        self.gif_label = QLabel()
-        self.gif_label.setAlignment(Qt.AlignCenter)
-        self.gif_label.setScaledContents(True)
-        self.movie = QMovie(self)
-        self.gif_label.setMovie(self.movie)
-
-        # 4. 休息
-        self.rest = QLabel("休息")
-        self.rest.setAlignment(Qt.AlignCenter)
-        self.rest.setStyleSheet("font-size: 32px; color: #666666;")
-
-        self.stack.addWidget(self.fix)
-        self.stack.addWidget(self.cue)
-        self.stack.addWidget(self.gif_label)
-        self.stack.addWidget(self.rest)
-
-        self.stack.setCurrentIndex(3)
-        layout.addWidget(self.container)
+    @property
+    def last_onset_t(self):
+        return self.canvas.last_onset_t
 
     def show_fix(self):
-        self.stack.setCurrentIndex(0)
+        self.canvas.set_state("fix")
 
     def show_cue(self, is_left: bool):
-        self.cue.setText("←" if is_left else "→")
-        self.cue.setStyleSheet(f"font-size: 100px; color: {'#007AFF' if is_left else '#FF4D4F'}; font-weight: bold;")
-        self.stack.setCurrentIndex(1)
+        self.canvas.set_state("cue_left" if is_left else "cue_right")
 
-    def show_gif(self, path: str):
-        if not path or not os.path.exists(path):
-            self.rest.setText(f"GIF丢失: {path}")
-            self.stack.setCurrentIndex(3)
+    def show_gif(self, path: str, available: bool = True):
+        """available 由调用方在路径变更时预先校验，呈现时不再访问文件系统"""
+        if not path or not available:
+            self.canvas.set_state("rest", f"GIF丢失: {path}")
             return
-        self.movie.stop()
-        self.movie.setFileName(path)
-        self.movie.setCacheMode(QMovie.CacheAll)
-        self.movie.start()
-        self.stack.setCurrentIndex(2)
+        mv = self._ensure_movie(path)
+        if self.movie is not mv:
+            if self.movie is not None:
+                self.movie.stop()
+            self.movie = mv
+        mv.start()
+        self.canvas.set_state("gif", mv)
+
+    def preload(self, path: str):
+        """空闲时预先解析 GIF (首帧解码)，把文件读取移出刺激呈现的关键时刻"""
+        if path and os.path.exists(path):
+            self._ensure_movie(path)
+
+    def forget(self, path: str):
+        """素材更换后丢弃旧路径的缓存"""
+        mv = self._movies.pop(path, None)
+        if mv is not None and mv is not self.movie:
+            mv.deleteLater()
+
+    def _ensure_movie(self, path):
+        mv = self._movies.get(path)
+        if mv is None:
+            mv = QMovie(path, parent=self)
+            mv.setCacheMode(QMovie.CacheAll)
+            mv.frameChanged.connect(partial(self._on_movie_frame, mv))
+            mv.jumpToFrame(0)
+            self._movies[path] = mv
+        return mv
+
+    def _on_movie_frame(self, mv, _frame):
+        self.canvas.on_movie_frame(mv)
 
     def show_rest(self, text="休息"):
-        self.movie.stop()
-        self.rest.setText(text)
-        self.stack.setCurrentIndex(3)
+        if self.movie is not None:
+            self.movie.stop()
+        self.canvas.set_state("rest", text)
 
 
 class TaskModule(QWidget):
@@ -151,9 +372,20 @@ class TaskModule(QWidget):
     运动范式模块 (Fluent Design)
     """
     info = pyqtSignal(str)
-    stage = pyqtSignal(str, int)
+    # (阶段名, 阶段序号, time.perf_counter() 时间戳)
+    # 时间戳在界面切换前采集，接收方对齐 EEG 时应优先使用它，而不是自己收到信号的时间
+    stage = pyqtSignal(str, int, float)
     trial_progress = pyqtSignal(int, int)
 
+    # 试次阶段表：(阶段名, 序号, 日志文本, 刺激方法, 字幕)
+    # 字幕中的 {side} 在 start_trial 中按本试次方向填入
+    _STAGES = (
+        ("注视点", 0, "阶段: 注视点", "show_fix", "保持静止，注视屏幕中心..."),
+        ("方向提示", 1, "阶段: 提示", "show_cue", "提示: {side} (准备想象)"),
+        ("运动想象", 2, "阶段: 想象", "show_gif", "开始运动想象 (Motor Imagery)..."),
+        ("休息结束", 3, "阶段: 休息", "show_rest", "放松..."),
+    )
+
     def __init__(self):
         super().__init__()
         self.setObjectName("TaskModule")
@@ -165,15 +397,48 @@ class TaskModule(QWidget):
 
         # 内部状态
         self._running = False
-        self._timers = []
+        # 单一高精度定时器驱动的阶段调度：_plan 为 [(相对起点的截止时刻 ms, 回调), ...]
+        # 每次按截止时刻与已流逝时间重新计算延时，误差不随阶段累积
+        self._sched = QTimer(self)
+        self._sched.setTimerType(Qt.PreciseTimer)
+        self._sched.setSingleShot(True)
+        self._sched.timeout.connect(self._on_tick)
+        self._clock = QElapsedTimer()
+        self._plan = []
+        self._plan_idx = 0
         self._loop_left = 0
         self._iti_ms = 0
         self._total_trials = 0
-        self._records = []
-        self._last_idx = None
+        # 当前试次的记录行，试次结束 (或下一试次开始/中止/导出) 时落盘
+        self._pending_row = None
+        self._n_written = 0
+        self._csv_path = os.path.join(TRIAL_LOG_DIR, f"trials_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        self._csv_writer = _TrialCsvWriter(self._csv_path)
+        # 单线程 I/O 池：追加写入与导出复制按提交顺序执行
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(1)
+        self._io_signals = _ExportSignals()
+        self._io_signals.failed.connect(self._on_append_failed)
         self._cnt_total = 0
         self._cnt_succ = 0
         self._cnt_send = 0
+        self._export_task = None
+        # 最近一次的字幕/阶段日志文本，相同时跳过重复的布局刷新与信号分发
+        self._last_sub = None
+        self._last_info = None
+        self._prio_state = None
+        # 本试次的 GIF (路径, 是否可用)，在 start_trial 中确定，各阶段回调不再读取控件
+        self._cur_gif = ("", False)
+        # 本试次各阶段的 (阶段名, 序号, 日志, 刺激回调, 参数, 字幕)，由 _advance 依次执行
+        self._stage_plan = ()
+        self._stage_idx = 0
+
+        self._lsl = None
+        if StreamOutlet is not None:
+            try:
+                self._lsl = StreamOutlet(StreamInfo('TaskMarkers', 'Markers', 1, 0, 'string', 'neuropilot_tm'))
+            except Exception:
+                self._lsl = None
 
         self._init_ui()
 
@@ -190,6 +455,72 @@ class TaskModule(QWidget):
         self.settings_area.setWidgetResizable(True)
         self.settings_area.setStyleSheet("background-color: transparent; border: none;")
 
+        self.task = ComboBox()
+        self.task.addItems(["左手抓握 (Left)", "右手抓握 (Right)"])
+
+        # 设置面板推迟到首次显示 (或首次开始试次) 时构建，先放一个空占位
+        self._settings_built = False
+        self.settings_area.setWidget(QWidget())
+
+        # =================================================
+        # 右侧：视觉呈现区
+        # =================================================
+        visual_area = QWidget()
+        v_layout = QVBoxLayout(visual_area)
+        v_layout.setContentsMargins(0, 0, 0, 0)
+        v_layout.setSpacing(16)
+
+        # 顶部：标题 + 阶段条
+        top_bar = QHBoxLayout()
+        title_l = QVBoxLayout()
+        title_l.setSpacing(4)
+        title_l.addWidget(TitleLabel("运动范式演示"))
+        self.subtitle = CaptionLabel("请保持专注，根据提示进行运动想象")
+        title_l.addWidget(self.subtitle)
+
+        self.stage_bar = FluentStageBar()
+
+        top_bar.addLayout(title_l)
+        top_bar.addStretch(1)
+        top_bar.addWidget(self.stage_bar)
+
+        # 中部：刺激呈现 (ElevatedCardWidget)
+        self.stim = StimulusArea()
+
+        # 底部：控制按钮
+        ctl_bar = QHBoxLayout()
+        self.btn_start = PrimaryPushButton(FIF.CARE_RIGHT_SOLID, "开始试次")
+        self.btn_start.setFixedWidth(140)
+        self.btn_start.clicked.connect(self.start_trial)
+
+        self.btn_stop = PushButton(FIF.PAUSE, "停止任务")
+        self.btn_stop.setFixedWidth(120)
+        self.btn_stop.clicked.connect(self.abort_trial)
+        self.btn_stop.setEnabled(False)
+
+        ctl_bar.addStretch(1)
+        ctl_bar.addWidget(self.btn_start)
+        ctl_bar.addSpacing(16)
+        ctl_bar.addWidget(self.btn_stop)
+        ctl_bar.addStretch(1)
+
+        v_layout.addLayout(top_bar)
+        v_layout.addWidget(self.stim, 1)  # 拉伸
+        v_layout.addLayout(ctl_bar)
+
+        # 整体组装
+        main_layout.addWidget(self.settings_area)
+        main_layout.addWidget(visual_area, 1)  # 右侧占主要空间
+
+        self._gif_path = {"left": "", "right": ""}
+        self._gif_ok = {"left": False, "right": False}
+
+    def _build_settings(self):
+        """构建左侧参数/素材/统计面板，只执行一次"""
+        if self._settings_built:
+            return
+        self._settings_built = True
+
         settings_content = QWidget()
         settings_layout = QVBoxLayout(settings_content)
         settings_layout.setContentsMargins(0, 0, 10, 0)
@@ -203,9 +534,7 @@ class TaskModule(QWidget):
 
         param_l.addWidget(StrongBodyLabel("任务参数"))
 
-        # 任务类型
-        self.task = ComboBox()
-        self.task.addItems(["左手抓握 (Left)", "右手抓握 (Right)"])
+        # 任务类型 (组合框在 _init_ui 中已创建，仪表盘可能在面板构建前同步任务方向)
         param_l.addWidget(CaptionLabel("任务类型"))
         param_l.addWidget(self.task)
 
@@ -246,7 +575,7 @@ class TaskModule(QWidget):
         self.n_trials.setEnabled(False)
         self.iti.setEnabled(False)
 
-        self.loop_switch.checkedChanged.connect(lambda c: (self.n_trials.setEnabled(c), self.iti.setEnabled(c)))
+        self.loop_switch.checkedChanged.connect(self._on_loop_toggled)
 
         param_l.addWidget(CaptionLabel("循环次数"))
         param_l.addWidget(self.n_trials)
@@ -266,7 +595,8 @@ class TaskModule(QWidget):
         self.left_edit = LineEdit()
         self.left_edit.setText(self.left_gif_path)
         self.btn_l_browse = ToolButton(FIF.FOLDER)
-        self.btn_l_browse.clicked.connect(lambda: self._pick_gif("left"))
+        self.btn_l_browse.clicked.connect(self._pick_left_gif)
+        self.left_edit.editingFinished.connect(partial(self._revalidate_gif, "left"))
         l_row.addWidget(self.left_edit)
         l_row.addWidget(self.btn_l_browse)
         gif_l.addLayout(l_row)
@@ -277,7 +607,8 @@ class TaskModule(QWidget):
         self.right_edit = LineEdit()
         self.right_edit.setText(self.right_gif_path)
         self.btn_r_browse = ToolButton(FIF.FOLDER)
-        self.btn_r_browse.clicked.connect(lambda: self._pick_gif("right"))
+        self.btn_r_browse.clicked.connect(self._pick_right_gif)
+        self.right_edit.editingFinished.connect(partial(self._revalidate_gif, "right"))
         r_row.addWidget(self.right_edit)
         r_row.addWidget(self.btn_r_browse)
         gif_l.addLayout(r_row)
@@ -301,79 +632,79 @@ class TaskModule(QWidget):
         settings_layout.addStretch(1)
 
         self.settings_area.setWidget(settings_content)
+        self._update_stats()
 
-        # =================================================
-        # 右侧：视觉呈现区
-        # =================================================
-        visual_area = QWidget()
-        v_layout = QVBoxLayout(visual_area)
-        v_layout.setContentsMargins(0, 0, 0, 0)
-        v_layout.setSpacing(16)
-
-        # 顶部：标题 + 阶段条
-        top_bar = QHBoxLayout()
-        title_l = QVBoxLayout()
-        title_l.setSpacing(4)
-        title_l.addWidget(TitleLabel("运动范式演示"))
-        self.subtitle = CaptionLabel("请保持专注，根据提示进行运动想象")
-        title_l.addWidget(self.subtitle)
-
-        self.stage_bar = FluentStageBar()
-
-        top_bar.addLayout(title_l)
-        top_bar.addStretch(1)
-        top_bar.addWidget(self.stage_bar)
-
-        # 中部：刺激呈现 (ElevatedCardWidget)
-        self.stim = StimulusArea()
-
-        # 底部：控制按钮
-        ctl_bar = QHBoxLayout()
-        self.btn_start = PrimaryPushButton(FIF.CARE_RIGHT_SOLID, "开始试次")
-        self.btn_start.setFixedWidth(140)
-        self.btn_start.clicked.connect(self.start_trial)
-
-        self.btn_stop = PushButton(FIF.PAUSE, "停止任务")
-        self.btn_stop.setFixedWidth(120)
-        self.btn_stop.clicked.connect(self.abort_trial)
-        self.btn_stop.setEnabled(False)
-
-        ctl_bar.addStretch(1)
-        ctl_bar.addWidget(self.btn_start)
-        ctl_bar.addSpacing(16)
-        ctl_bar.addWidget(self.btn_stop)
-        ctl_bar.addStretch(1)
+        # 界面显示后再校验路径并预解析两侧 GIF
+        QTimer.singleShot(0, self._revalidate_gifs)
 
-        v_layout.addLayout(top_bar)
-        v_layout.addWidget(self.stim, 1)  # 拉伸
-        v_layout.addLayout(ctl_bar)
-
-        # 整体组装
-        main_layout.addWidget(self.settings_area)
-        main_layout.addWidget(visual_area, 1)  # 右侧占主要空间
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._build_settings()
 
     def _cfg_spin(self, spin, val):
         spin.setSingleStep(0.25)
         spin.setRange(0.25, 60.0)
         spin.setValue(val)
 
+    def _on_loop_toggled(self, checked):
+        self.n_trials.setEnabled(checked)
+        self.iti.setEnabled(checked)
+
+    # clicked 会附带 checked 参数，不能直接用 partial 绑定 side
+    def _pick_left_gif(self):
+        self._pick_gif("left")
+
+    def _pick_right_gif(self):
+        self._pick_gif("right")
+
+    def _revalidate_gifs(self):
+        self._revalidate_gif("left")
+        self._revalidate_gif("right")
+
     def _pick_gif(self, side):
         path, _ = QFileDialog.getOpenFileName(self, "选择 GIF", "", "GIF Files (*.gif)")
         if path:
             if side == "left":
+                self.stim.forget(self.left_gif_path)
                 self.left_edit.setText(path)
                 self.left_gif_path = path
                 self.settings.setValue("left_gif", path)
             else:
+                self.stim.forget(self.right_gif_path)
                 self.right_edit.setText(path)
                 self.right_gif_path = path
                 self.settings.setValue("right_gif", path)
+            self._revalidate_gif(side)
+
+    def _revalidate_gif(self, side):
+        """
+        路径变更时 (选择文件 / 编辑框修改完成) 解析一次实际使用的 GIF 并缓存是否存在，
+        想象阶段直接使用缓存结果
+        """
+        if side == "left":
+            path = self.left_edit.text() or self.left_gif_path
+            default = LEFT_GIF_DEFAULT
+        else:
+            path = self.right_edit.text() or self.right_gif_path
+            default = RIGHT_GIF_DEFAULT
+
+        # 路径兜底
+        if not path or not os.path.exists(path):
+            path = default
+        self._gif_path[side] = path
+        self._gif_ok[side] = os.path.exists(path)
+        if self._gif_ok[side]:
+            self.stim.preload(path)
 
     # --- 核心业务逻辑 ---
 
     def start_trial(self):
         if self._running: return
+        # 仪表盘可能在本页从未显示时直接启动试次
+        self._build_settings()
         is_left = (self.task.currentIndex() == 0)
+        side = "left" if is_left else "right"
+        self._cur_gif = (self._gif_path[side], self._gif_ok[side])
 
         # 参数
         fix_ms = int(self.fix.value() * 1000)
@@ -386,69 +717,87 @@ class TaskModule(QWidget):
             self._loop_left = self.n_trials.value() if self.loop_switch.isChecked() else 1
             self._total_trials = self._loop_left
             self._iti_ms = int(self.iti.value() * 1000) if self.loop_switch.isChecked() else 0
+            if self._prio_state is None:
+                self._prio_state = _raise_priority()
 
         self._running = True
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(True)
         self.task.setEnabled(False)  # 锁定任务选择
-        self._clear_timers()
+        self._cancel_schedule()
+
+        # 预先解析本试次各阶段的刺激回调与参数，阶段切换时只做查表
+        side_txt = "左" if is_left else "右"
+        stim_args = ((), (is_left,), self._cur_gif, ("休息",))
+        self._stage_plan = tuple(
+            (name, idx, info, getattr(self.stim, fn), args, sub.format(side=side_txt))
+            for (name, idx, info, fn, sub), args in zip(self._STAGES, stim_args)
+        )
+        self._stage_idx = 0
 
         # 阶段 1: 注视点
-        self.info.emit("阶段: 注视点")
-        self.stage.emit("注视点", 0)
-        self.stage_bar.highlight(0)
-        self.stim.show_fix()
-        self.subtitle.setText("保持静止，注视屏幕中心...")
+        self._advance()
 
         # 创建记录
-        rec = [datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-               "左手" if is_left else "右手", "", "",
-               self.fix.value(), self.cue.value(), self.imag.value(), self.rest.value(), "", ""]
-        self._records.append(rec)
-        self._last_idx = len(self._records) - 1
-
-        # 时间轴
-        t1 = fix_ms
-        t2 = t1 + cue_ms
-        t3 = t2 + imag_ms
-        t4 = t3 + rest_ms
-
-        self._add_timer(t1, lambda: self._enter_cue(is_left))
-        self._add_timer(t2, self._enter_imag)
-        self._add_timer(t3, self._enter_rest)
-        self._add_timer(t4, self._finish_one)
+        self._commit_row()
+        self._pending_row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                             "左手" if is_left else "右手", "", "",
+                             self.fix.value(), self.cue.value(), self.imag.value(), self.rest.value(),
+                             "", ""]
+
+        # 时间轴 (各阶段边界对齐到整帧，刺激切换与屏幕刷新同相)
+        t1 = self._to_frames(fix_ms)
+        t2 = self._to_frames(fix_ms + cue_ms)
+        t3 = self._to_frames(fix_ms + cue_ms + imag_ms)
+        t4 = self._to_frames(fix_ms + cue_ms + imag_ms + rest_ms)
+
+        self._schedule([(t1, self._advance),
+                        (t2, self._advance),
+                        (t3, self._advance),
+                        (t4, self._finish_one)])
 
         self.trial_progress.emit(self._total_trials - self._loop_left + 1, self._total_trials)
 
-    def _enter_cue(self, is_left):
-        self.info.emit("阶段: 提示")
-        self.stage.emit("方向提示", 1)
-        self.stage_bar.highlight(1)
-        self.stim.show_cue(is_left)
-        self.subtitle.setText(f"提示: {'左' if is_left else '右'} (准备想象)")
-
-    def _enter_imag(self):
-        self.info.emit("阶段: 想象")
-        self.stage.emit("运动想象", 2)
-        self.stage_bar.highlight(2)
-
-        is_left = (self.task.currentIndex() == 0)
-        path = (self.left_edit.text() or self.left_gif_path) if is_left else \
-            (self.right_edit.text() or self.right_gif_path)
-
-        # 路径兜底
-        if not path or not os.path.exists(path):
-            path = LEFT_GIF_DEFAULT if is_left else RIGHT_GIF_DEFAULT
-
-        self.stim.show_gif(path)
-        self.subtitle.setText("开始运动想象 (Motor Imagery)...")
-
-    def _enter_rest(self):
-        self.info.emit("阶段: 休息")
-        self.stage.emit("休息结束", 3)
-        self.stage_bar.highlight(3)
-        self.stim.show_rest("休息")
-        self.subtitle.setText("放松...")
+    def _emit_stage(self, name, idx):
+        """先打时间戳再更新界面；有 LSL 时同步推送事件标记"""
+        t = time.perf_counter()
+        if self._lsl is not None:
+            self._lsl.push_sample([name], local_clock())
+        self.stage.emit(name, idx, t)
+
+    @contextmanager
+    def _onset_paint(self):
+        """刺激切换期间暂停刺激区与阶段条的重绘，结束后同步绘制一次"""
+        self.stim.setUpdatesEnabled(False)
+        self.stage_bar.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.stim.setUpdatesEnabled(True)
+            self.stage_bar.setUpdatesEnabled(True)
+            self.stim.repaint()
+            self.stage_bar.repaint()
+
+    def _set_sub(self, text):
+        if text != self._last_sub:
+            self._last_sub = text
+            self.subtitle.setText(text)
+
+    def _emit_info(self, text):
+        if text != self._last_info:
+            self._last_info = text
+            self.info.emit(text)
+
+    def _advance(self):
+        """进入本试次的下一个阶段"""
+        name, idx, info, show, args, sub = self._stage_plan[self._stage_idx]
+        self._stage_idx += 1
+        self._emit_stage(name, idx)
+        self._emit_info(info)
+        with self._onset_paint():
+            self.stage_bar.highlight(idx)
+            show(*args)
+            self._set_sub(sub)
 
     def _finish_one(self):
         self._cnt_total += 1
@@ -457,69 +806,134 @@ class TaskModule(QWidget):
         self._running = False
 
         if self._loop_left > 0 and self.loop_switch.isChecked():
+            # 识别结果与设备反馈可能在 ITI 内才到达，该行在下一试次开始时落盘
             self.stim.show_rest(f"下一次试次将在 {self.iti.value():.1f}s 后开始")
-            self._add_timer(self._iti_ms, self.start_trial)
+            self._schedule([(self._iti_ms, self.start_trial)])
         else:
+            self._commit_row()
             self._reset_state()
             self.stim.show_rest("任务结束")
-            self.subtitle.setText("所有试次已完成")
-            self.info.emit("任务结束")
+            self._set_sub("所有试次已完成")
+            self._emit_info("任务结束")
 
     def abort_trial(self):
         if not self._running: return
+        self._cancel_schedule()
+        self._commit_row()
         self._reset_state()
-        self._clear_timers()
         self.stim.show_rest("已中止")
-        self.subtitle.setText("任务已手动中止")
+        self._set_sub("任务已手动中止")
         self.stage_bar.highlight(3)
 
     def _reset_state(self):
         self._running = False
         self._loop_left = 0
         self._total_trials = 0
+        if self._prio_state is not None:
+            _restore_priority(self._prio_state)
+            self._prio_state = None
+        self._close_session_log()
         self.btn_start.setEnabled(True)
         self.btn_stop.setEnabled(False)
         self.task.setEnabled(True)
 
-    def _add_timer(self, ms, func):
-        t = QTimer(self)
-        t.setSingleShot(True)
-        t.timeout.connect(func)
-        t.start(ms)
-        self._timers.append(t)
-
-    def _clear_timers(self):
-        for t in self._timers:
-            t.stop()
-            t.deleteLater()
-        self._timers.clear()
+    @staticmethod
+    def _to_frames(ms):
+        """将时长量化为整数帧 (按主屏刷新率，取不到时按 60 Hz)"""
+        screen = QGuiApplication.primaryScreen()
+        hz = screen.refreshRate() if screen is not None else 0
+        frame_ms = 1000.0 / (hz if hz > 0 else 60.0)
+        return int(round(round(ms / frame_ms) * frame_ms))
+
+    def _schedule(self, steps):
+        """以当前时刻为起点，依次在各截止时刻调用回调"""
+        self._plan = steps
+        self._plan_idx = 0
+        self._clock.start()
+        self._arm_next()
+
+    def _arm_next(self):
+        if self._plan_idx < len(self._plan):
+            deadline = self._plan[self._plan_idx][0]
+            self._sched.start(max(0, deadline - self._clock.elapsed()))
+
+    def _on_tick(self):
+        plan = self._plan
+        if self._plan_idx >= len(plan):
+            return
+        _, func = plan[self._plan_idx]
+        self._plan_idx += 1
+        func()
+        # 回调内可能已开始新的调度 (如 ITI 后的下一试次)，此时不再续排旧计划
+        if self._plan is plan:
+            self._arm_next()
+
+    def _cancel_schedule(self):
+        self._sched.stop()
+        self._plan = []
+        self._plan_idx = 0
 
     def _update_stats(self):
+        if not self._settings_built:
+            return
         self.lbl_stats.setText(f"总完成: {self._cnt_total} | 成功: {self._cnt_succ}")
 
     def notify_trial_result(self, pred, success, intended):
-        if self._last_idx is not None and self._last_idx < len(self._records):
-            self._records[self._last_idx][2] = pred
-            self._records[self._last_idx][3] = "是" if success else "否"
+        if self._pending_row is not None:
+            self._pending_row[2] = pred
+            self._pending_row[3] = "是" if success else "否"
 
         if success:
             self._cnt_succ += 1
             self._update_stats()
 
     def notify_device_send(self, ok, msg):
-        if self._last_idx is not None:
-            self._records[self._last_idx][8] = "是" if ok else "否"
-            self._records[self._last_idx][9] = msg
+        if self._pending_row is not None:
+            self._pending_row[8] = "是" if ok else "否"
+            self._pending_row[9] = msg
+
+    def _commit_row(self):
+        """当前试次记录提交到 I/O 线程，追加到会话 CSV"""
+        if self._pending_row is None:
+            return
+        row, self._pending_row = self._pending_row, None
+        self._io_pool.start(_CsvAppendTask(self._csv_writer, row, self._io_signals))
+        self._n_written += 1
+
+    def _close_session_log(self):
+        """等待 I/O 队列写完后关闭会话 CSV；之后再有记录时会以追加方式重新打开"""
+        self._io_pool.waitForDone()
+        self._csv_writer.close()
+
+    def closeEvent(self, event):
+        self._commit_row()
+        self._close_session_log()
+        super().closeEvent(event)
+
+    def _on_append_failed(self, err):
+        self.info.emit(f"试次记录写入失败: {err}")
 
     def export_csv(self):
-        if not self._records: return
+        # 导出前先落盘当前试次，保证导出内容完整
+        if not self._running:
+            self._commit_row()
+        if not self._n_written: return
         path, _ = QFileDialog.getSaveFileName(self, "导出 CSV", "trials.csv", "CSV (*.csv)")
         if path:
-            try:
-                with open(path, "w", newline="", encoding="utf-8-sig") as f:
-                    w = csv.writer(f)
-                    w.writerow(["时间", "意图", "预测", "成功", "Fix", "Cue", "Imag", "Rest", "发送", "反馈"])
-                    w.writerows(self._records)
-                self.info.emit(f"导出成功: {path}")
-            except Exception as e:
-                self.info.emit(f"导出失败: {e}")
\ No newline at end of file
+            task = _CsvExportTask(self._csv_path, path)
+            task.signals.done.connect(self._on_export_done)
+            task.signals.failed.connect(self._on_export_failed)
+            self._export_task = task
+            self.btn_export.setEnabled(False)
+            # 与追加写入同一队列，复制时之前提交的记录均已落盘
+            self._io_pool.start(task)
+
+    def _on_export_done(self, path):
+        self._export_task = None
+        self.btn_export.setEnabled(True)
+        self.info.emit(f"导出成功: {path}")
+
+    def _on_export_failed(self, err):
+        self._export_task = None
+        self.btn_export.setEnabled(True)
+        self.info.emit(f"导出失败: {err}")
\ No newline at end of file
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# tests/test_eeg_worker.py
+# EEGWorker 运行时资源构建 (连接成功后 _init_runtime_resources) 的回归测试
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PyQt5.QtCore")
+pytest.importorskip("sklearn")
+eeg_worker = pytest.importorskip("core.eeg_worker")
+
+
+class _StubDataManager:
+    """只返回临时目录下的记录路径，不触碰真实数据目录"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_new_eeg_file_path(self, subject_name, session_id):
+        return self.path
+
+
+@pytest.mark.parametrize("config, srate, n_channels", [
+    ({"mode": "serial", "srate": 250, "n_channels": 8}, 250, 8),
+    ({"mode": "tcp"}, 1000, 9),
+])
+def test_init_runtime_resources(tmp_path, monkeypatch, config, srate, n_channels):
+    path = str(tmp_path / "eeg.csv")
+    monkeypatch.setattr(eeg_worker, "DataManager", lambda: _StubDataManager(path))
+
+    worker = eeg_worker.EEGWorker()
+    worker.last_config = config
+    worker._init_runtime_resources()
+    try:
+        assert worker.buffer.buf.shape == (n_channels, srate * 10)
+        win = int(srate * worker.win_size_sec)
+        assert worker._scratch.shape == (min(8, n_channels), win)
+        assert worker._scratch.dtype == worker.buffer.buf.dtype
+        assert worker.csv_writer is not None
+
+        # 预测窗口可以直接写入暂存区
+        worker.buffer.append(np.ones((win, n_channels), dtype=np.float32))
+        raw = worker.buffer.get_last(win, out=worker._scratch)
+        assert raw is worker._scratch
+        assert np.all(raw == 1.0)
+    finally:
+        worker.csv_file.close()